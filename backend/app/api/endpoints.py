@@ -1,30 +1,28 @@
+import asyncio
+import json
 import os
-from collections import Counter
 from pathlib import Path
 
-import httpx
-import mutagen
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from app.domain.models import Album, MusicFile
+from app.core.settings import settings
+from app.domain.models import Album, JobInfo, LibraryHealthIssue, Page
+from app.services.covers import cover_mime, get_cover_store
+from app.services.http_client import get_http_client
 from app.services.identification import IdentificationService
+from app.services.jobs import get_job_manager, identify_runner, organize_runner, scan_runner, tag_runner
+from app.services.musicbrainz_cache import get_musicbrainz_cache
+from app.services.musicbrainz_scheduler import INTERACTIVE, get_musicbrainz_scheduler
 from app.services.organization import OrganizationService
+from app.services.scan_results import album_filter, get_scan_results, health_filter
+from app.services.scanning import ScanService
 from app.services.tagging import TaggingService
+from app.services.thumbnails import get_thumbnail_cache
 
 router = APIRouter()
 
-def sanitize_str(val):
-    if not isinstance(val, str):
-        return val
-    try:
-        # Convert surrogate escapes back to bytes, then replace invalid utf-8
-        return val.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
-    except Exception:
-        return str(val)
-
-AUDIO_EXTENSIONS = {'.mp3', '.flac', '.wav', '.m4a', '.ogg'}
-
 class ScanRequest(BaseModel):
     input_path: str
     output_path: str
@@ -36,13 +34,24 @@ class OrganizeRequest(BaseModel):
 class LibraryScanRequest(BaseModel):
     input_path: str
 
-class LibraryHealthIssue(BaseModel):
-    folder_path: str
-    missing_cover: bool
-    missing_mbid: bool
-    track_count: int
-    found_mbid: str | None = None
-    cover_base64: str | None = None
+class ScanPageRequest(BaseModel):
+    input_path: str
+    cursor: str | None = None
+    limit: int = 100
+    refresh: bool = False  # Rescan instead of paging through the stored results
+    status: str | None = None
+    missing_cover: bool | None = None
+    missing_mbid: bool | None = None
+    artist_prefix: str | None = None
+
+class LibraryScanPageRequest(BaseModel):
+    input_path: str
+    cursor: str | None = None
+    limit: int = 100
+    refresh: bool = False
+    missing_cover: bool | None = None
+    missing_mbid: bool | None = None
+    artist_prefix: str | None = None
 
 @router.get("/health")
 async def health_check():
@@ -56,156 +65,121 @@ async def readiness_check():
 @router.get("/connectivity/musicbrainz")
 async def check_musicbrainz_connection():
     try:
-        # Verify connection to MusicBrainz
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get("https://musicbrainz.org", follow_redirects=True)
-            if resp.status_code in [200, 301, 302]:
-                return {"status": "online", "message": "Connected to MusicBrainz"}
-            return {"status": "offline", "message": f"Status Code: {resp.status_code}"}
+        # Verify connection to the configured MusicBrainz web service (a mirror or local stand-in if so set)
+        await get_musicbrainz_scheduler().acquire(INTERACTIVE)
+        resp = await get_http_client().get(
+            f"{settings.MUSICBRAINZ_BASE_URL.rstrip('/')}/release",
+            params={"query": "release:test", "limit": 1, "fmt": "json"},
+            headers={"User-Agent": IdentificationService.USER_AGENT, "Accept": "application/json"},
+            timeout=5.0,
+        )
+        if resp.status_code == 200:
+            return {"status": "online", "message": "Connected to MusicBrainz"}
+        return {"status": "offline", "message": f"Status Code: {resp.status_code}"}
     except Exception as e:
         return {"status": "offline", "message": str(e)}
 
+@router.get("/musicbrainz/cache")
+async def musicbrainz_cache_stats() -> dict:
+    cache = get_musicbrainz_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.delete("/musicbrainz/cache", status_code=204)
+async def clear_musicbrainz_cache():
+    cache = get_musicbrainz_cache()
+    if cache is not None:
+        cache.clear()
+
 @router.post("/scan")
 async def scan_directory(request: ScanRequest) -> list[Album]:
     input_path = Path(request.input_path)
     if not input_path.exists():
         raise HTTPException(status_code=404, detail=f"Path not found: {request.input_path}")
 
-    albums_map = {}
-    
-    for root, _, files in os.walk(input_path):
-        audio_files = [f for f in files if Path(f).suffix.lower() in AUDIO_EXTENSIONS]
-        if not audio_files:
-            continue
-            
-        root_path = Path(root)
-        album_files = []
-        
-        # Heuristic metadata aggregation from files
-        artists = []
-        albums_titles = []
-        years = []
-        
-        for file in audio_files:
-            file_path = root_path / file
-            stat = file_path.stat()
-            
-            # Read metadata
-            # title = None # usage optimization
-            artist = None
-            album_name = None
-            year = None
-            
-            try:
-                f = mutagen.File(file_path, easy=True)
-                if f:
-                    f.get('title', [None])[0]
-                    artist = f.get('artist', [None])[0]
-                    album_name = f.get('album', [None])[0]
-                    date = f.get('date', [None])[0] 
-                    if date:
-                        # Extract year 2021 from "2021-01-01"
-                        year = int(str(date)[:4]) if str(date)[:4].isdigit() else None
-                    
-                    if artist:
-                        artists.append(artist)
-                    if album_name:
-                        albums_titles.append(album_name)
-                    if year:
-                        years.append(year)
-            except Exception as e:
-                print(f"Error reading metadata for {file}: {e}")
-
-
-
-            # Extended Metadata Reading (ID3 v2.3/2.4) to find MusicBrainz IDs
-            mb_release_id = None
-            if file_path.suffix.lower() == '.mp3':
-                try:
-                    from mutagen.id3 import ID3
-                    tags = ID3(str(file_path))
-                    # TXXX:MusicBrainz Release Id
-                    # Mutagen access TXXX frames: TXXX:desc
-                    txxx_frames = tags.getall("TXXX") # returns list of TXXX frames
-                    for frame in txxx_frames:
-                        if frame.desc.lower() == 'musicbrainz release id':
-                            mb_release_id = str(frame.text[0])
-                        # Also could read other IDs here
-                except Exception:
-                    # Usually means no id3 tag or error reading
-                    pass
-
-            music_file = MusicFile(
-                filename=sanitize_str(file),
-                path=sanitize_str(str(file_path)),
-                extension=file_path.suffix.lower(),
-                size_bytes=stat.st_size,
-                artist=sanitize_str(artist),
-                album=sanitize_str(album_name),
-                year=year,
-                extended_tags={'musicbrainz_albumid': sanitize_str(mb_release_id)} if mb_release_id else {}
-            )
-            album_files.append(music_file)
-
-        # Determine majority vote for Folder Album info
-        def get_most_common(lst):
-            return Counter(lst).most_common(1)[0][0] if lst else None
-
-        detected_artist = get_most_common(artists)
-        detected_title = get_most_common(albums_titles)
-        detected_year = get_most_common(years)
-
-        # Fallback to folder name heuristics if tags missing
-        folder_name = root_path.name
-        if not detected_artist or not detected_title:
-             parts = folder_name.split(' - ')
-             if not detected_artist:
-                 detected_artist = parts[0] if len(parts) > 1 else "Unknown Artist"
-             if not detected_title:
-                 detected_title = parts[1] if len(parts) > 1 else folder_name
-
-        # Check for local cover art
-        local_cover = None
-        common_covers = ['cover.jpg', 'cover.png', 'folder.jpg', 'folder.png', 'front.jpg', 'front.png']
-        for cover_name in common_covers:
-            possible_cover = root_path / cover_name
-            # Case insensitive check might be needed for linux, but basic check first
-            if possible_cover.exists():
-                local_cover = possible_cover
-                break
-            # Try lowercase if file system is case sensitive but file is uppercase
-            if not local_cover:
-                 for f in files:
-                     if f.lower() == cover_name:
-                         local_cover = root_path / f
-                         break
-            if local_cover:
-                break
-
-        # Check consensus MBID
-        mb_ids = [
-            f.extended_tags.get('musicbrainz_albumid') 
-            for f in album_files if f.extended_tags.get('musicbrainz_albumid')
-        ]
-        consensus_mbid = None
-        if mb_ids and len(mb_ids) == len(album_files) and len(set(mb_ids)) == 1:
-             consensus_mbid = mb_ids[0]
-
-        album = Album(
-            id=sanitize_str(str(root_path)),
-            title=sanitize_str(detected_title) or "Unknown Album",
-            artist=sanitize_str(detected_artist) or "Unknown Artist",
-            year=detected_year,
-            path=sanitize_str(str(root_path)),
-            files=album_files,
-            # If we have ID, it's effectively matched but we need to fetch details. Let's keep Pending but pass ID.
-            status="Match" if consensus_mbid else "Pending",
-            mb_release_id=sanitize_str(consensus_mbid) if consensus_mbid else None,
-            local_cover_path=sanitize_str(str(local_cover)) if local_cover else None
-        )
-        albums_map[sanitize_str(str(root_path))] = album
+    service = ScanService()
+    albums = await service.scan(input_path)
+    get_scan_results().put_albums(input_path, albums)
+    return [album.to_model() for album in albums]
+
+@router.post("/scan/page")
+async def scan_directory_page(request: ScanPageRequest) -> Page[Album]:
+    """
+    Cursor-paginated, filterable view of the last scan of input_path, ordered by album path.
+    Scans on first use (or with refresh); later pages are served from the stored results.
+    """
+    input_path = Path(request.input_path)
+    if not input_path.exists():
+        raise HTTPException(status_code=404, detail=f"Path not found: {request.input_path}")
 
-    return list(albums_map.values())
+    store = get_scan_results()
+    snapshot = store.albums(input_path)
+    if snapshot is None or request.refresh:
+        store.put_albums(input_path, await ScanService().scan(input_path))
+        snapshot = store.albums(input_path)
+
+    predicate = album_filter(request.status, request.missing_cover, request.missing_mbid, request.artist_prefix)
+    try:
+        page = snapshot.page(request.cursor, request.limit, predicate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    page['items'] = [album.to_model() for album in page['items']]
+    return page
+
+@router.post("/scan/stream")
+async def scan_directory_stream(request: ScanRequest) -> StreamingResponse:
+    """
+    NDJSON variant of /scan. Emits one line per event as directories finish:
+    {"event": "album", "album": {...}, "progress": {...}}, periodic {"event": "progress", "progress": {...}}
+    and a final {"event": "done", "progress": {...}}.
+    """
+    input_path = Path(request.input_path)
+    if not input_path.exists():
+        raise HTTPException(status_code=404, detail=f"Path not found: {request.input_path}")
+
+    service = ScanService()
+
+    async def events():
+        progress = {}
+        async for event, album, progress in service.iter_scan(input_path):
+            line = {"event": event, "progress": progress}
+            if album is not None:
+                line["album"] = album.to_model().model_dump(mode="json")
+            yield json.dumps(line) + "\n"
+        yield json.dumps({"event": "done", "progress": progress}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+async def _event_stream(queue: asyncio.Queue):
+    """Formats queued events as server-sent events until a None event arrives."""
+    while True:
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout=15)
+        except TimeoutError:
+            # Comment line keeps proxies from closing an idle stream
+            yield ": keep-alive\n\n"
+            continue
+        if event is None:
+            return
+        yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+@router.get("/library/events")
+async def library_events(request: Request) -> StreamingResponse:
+    """
+    Server-sent events from the library watcher: album_updated, album_removed and resync.
+    Requires WATCH_ENABLED.
+    """
+    watcher = getattr(request.app.state, "watcher", None)
+    if watcher is None:
+        raise HTTPException(status_code=503, detail="Library watch mode is disabled")
+
+    async def events():
+        with watcher.subscribe() as queue:
+            async for chunk in _event_stream(queue):
+                yield chunk
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @router.post("/library-scan")
 async def scan_library_health(request: LibraryScanRequest) -> list[LibraryHealthIssue]:
@@ -213,144 +187,99 @@ async def scan_library_health(request: LibraryScanRequest) -> list[LibraryHealth
     if not input_path.exists():
         raise HTTPException(status_code=404, detail=f"Path not found: {request.input_path}")
 
-    issues = []
-    
-    for root, _, files in os.walk(input_path):
-        audio_files = [f for f in files if Path(f).suffix.lower() in AUDIO_EXTENSIONS]
-        if not audio_files:
-            continue
-            
-        root_path = Path(root)
-        
-        # Check for local cover art
-        has_cover = False
-        local_cover_path = None
-        common_covers = ['cover.jpg', 'cover.png', 'folder.jpg', 'folder.png', 'front.jpg', 'front.png']
-        for cover_name in common_covers:
-            possible_cover = root_path / cover_name
-            if possible_cover.exists():
-                has_cover = True
-                local_cover_path = possible_cover
-                break
-            if not has_cover:
-                 for f in files:
-                     if f.lower() == cover_name:
-                         has_cover = True
-                         local_cover_path = root_path / f
-                         break
-            if has_cover:
-                break
-                
-        # Check for embedded cover art or MBIDs safely using mutagen.File
-        has_mbid = False
-        found_mbid = None
-        cover_base64 = None
-        
-        # Load local cover to base64 if found
-        if local_cover_path:
-            try:
-                import base64
-                with open(local_cover_path, "rb") as img_file:
-                    encoded_string = base64.b64encode(img_file.read()).decode('utf-8')
-                    ext = local_cover_path.suffix.lower()[1:]
-                    mime = "jpeg" if ext == "jpg" else ext
-                    cover_base64 = f"data:image/{mime};base64,{encoded_string}"
-            except Exception:
-                pass
-                
+    service = ScanService()
+    issues = await service.library_health(input_path)
+    if not service.index:
+        get_scan_results().put_health(input_path, issues)
+    return issues
+
+@router.post("/library-scan/page")
+async def scan_library_health_page(request: LibraryScanPageRequest) -> Page[LibraryHealthIssue]:
+    """
+    Cursor-paginated, filterable library health report, ordered by folder path, with per-root counts.
+    Served from the scan index; refresh re-crawls and re-reads only folders that changed.
+    """
+    input_path = Path(request.input_path)
+    if not input_path.exists():
+        raise HTTPException(status_code=404, detail=f"Path not found: {request.input_path}")
+
+    service = ScanService()
+    if service.index:
         try:
-            import base64
-
-            import mutagen
-
-            # Iterate through files in case the first returned by os.walk lacks tags (happens on Windows NTFS)
-            for f_name in audio_files:
-                sample_file = root_path / f_name
-                try:
-                    audio = mutagen.File(str(sample_file))
-                except Exception:
-                    continue
-                    
-                if audio is not None:
-                    # 1. Check for embedded pictures
-                    if not has_cover:
-                        # Generic picture check (FLAC/MP4/Ogg)
-                        if hasattr(audio, 'pictures') and audio.pictures:
-                            has_cover = True
-                            try:
-                                pic = audio.pictures[0]
-                                b64 = base64.b64encode(pic.data).decode('utf-8')
-                                mime = pic.mime if hasattr(pic, 'mime') else 'image/jpeg'
-                                cover_base64 = f"data:{mime};base64,{b64}"
-                            except Exception:
-                                pass
-                        # ID3 specific check (APIC)
-                        elif hasattr(audio, 'tags') and audio.tags:
-                            apic_frames = [f for key, f in audio.tags.items() if key.startswith('APIC')]
-                            if apic_frames:
-                                has_cover = True
-                                try:
-                                    pic = apic_frames[0]
-                                    b64 = base64.b64encode(pic.data).decode('utf-8')
-                                    mime = pic.mime if hasattr(pic, 'mime') else 'image/jpeg'
-                                    cover_base64 = f"data:{mime};base64,{b64}"
-                                except Exception:
-                                    pass
-
-                    # 2. Check for MusicBrainz ID
-                    if not has_mbid and hasattr(audio, 'tags') and audio.tags:
-                        # Dict-like keys (FLAC, Vorbis, MP4)
-                        keys_to_check = audio.tags.keys() if hasattr(audio.tags, 'keys') else audio.tags
-                        for k_obj in keys_to_check:
-                            key = str(k_obj[0]) if isinstance(k_obj, tuple) else str(k_obj)
-                            
-                            k_lower = key.lower()
-                            is_mb = 'musicbrainz' in k_lower
-                            is_id = any(term in k_lower for term in ('albumid', 'release id', 'album id'))
-                            if is_mb and is_id:
-                                has_mbid = True
-                                try:
-                                    v = audio.tags[k_obj]
-                                    found_mbid = (str(v[0]) if v else None) if isinstance(v, list) else str(v)
-                                except Exception:
-                                    pass
-                                break
-                        
-                        # ID3 TXXX frames
-                        if not has_mbid and hasattr(audio.tags, 'getall'):
-                            for frame in audio.tags.getall("TXXX"):
-                                desc = frame.desc.lower()
-                                is_mb = 'musicbrainz' in desc
-                                is_id = any(term in desc for term in ('albumid', 'release id', 'album id'))
-                                if is_mb and is_id:
-                                    has_mbid = True
-                                    found_mbid = str(frame.text[0]) if frame.text else None
-                                    break
-                
-                # If both are found, we don't need to check more files
-                if has_mbid and has_cover:
-                    break
-
-        except Exception:
-            # Catch-all
-            pass
-
-        issues.append(LibraryHealthIssue(
-            folder_path=sanitize_str(str(root_path)),
-            missing_cover=not has_cover,
-            missing_mbid=not has_mbid,
-            track_count=len(audio_files),
-            found_mbid=sanitize_str(found_mbid) if found_mbid else None,
-            cover_base64=cover_base64
-        ))
+            return await service.health_page(
+                input_path, request.cursor, request.limit, request.missing_cover, request.missing_mbid,
+                request.artist_prefix, refresh=request.refresh,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
 
-    return issues
+    # Without the scan index, page through an in-memory snapshot of a full scan
+    store = get_scan_results()
+    snapshot = store.health(input_path)
+    if snapshot is None or request.refresh:
+        store.put_health(input_path, await service.library_health(input_path))
+        snapshot = store.health(input_path)
+
+    predicate = health_filter(request.missing_cover, request.missing_mbid, request.artist_prefix)
+    try:
+        return snapshot.page(request.cursor, request.limit, predicate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+@router.get("/covers/{name}")
+async def get_cover(name: str, request: Request) -> Response:
+    """
+    Serves a cover by content hash, straight from its album folder or, for embedded pictures, the cover cache.
+    The name never changes meaning, so clients may cache it forever.
+    """
+    path = await asyncio.get_running_loop().run_in_executor(None, get_cover_store().path_for, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Cover not found: {name}")
+
+    headers = {"ETag": f'"{name.split(".")[0]}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=cover_mime(name), headers=headers)
+
+@router.get("/covers/{name}/thumbnails/{size}")
+async def get_cover_thumbnail(name: str, size: int, request: Request) -> Response:
+    """JPEG thumbnail of a cached cover at one of THUMBNAIL_SIZES, generated on a worker thread if evicted."""
+    loop = asyncio.get_running_loop()
+    if await loop.run_in_executor(None, get_cover_store().path_for, name) is None:
+        raise HTTPException(status_code=404, detail=f"Cover not found: {name}")
+    path = await loop.run_in_executor(None, get_thumbnail_cache().get, name, size)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No {size}px thumbnail for {name}")
+
+    headers = {"ETag": f'"{name.split(".")[0]}-{size}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
 
 @router.post("/identify")
 async def identify_albums(albums: list[Album]) -> list[Album]:
     service = IdentificationService()
     return await service.identify_all(albums)
 
+@router.post("/identify/stream")
+async def identify_albums_stream(albums: list[Album]) -> StreamingResponse:
+    """
+    Server-sent events variant of /identify. Emits an album event per album as soon as it is resolved,
+    in completion order: {"event": "album", "index": ..., "album": {...}, "progress": {...}}, where index
+    is the album's position in the request. A final {"event": "done", "progress": {...}} ends the stream;
+    disconnecting cancels the rest of the batch.
+    """
+    service = IdentificationService()
+
+    async def events():
+        progress = {"done": 0, "total": len(albums)}
+        async for index, album, progress in service.iter_identify_progress(albums):
+            event = {"event": "album", "index": index, "album": album.model_dump(mode="json"), "progress": progress}
+            yield f"event: album\ndata: {json.dumps(event)}\n\n"
+        yield f"event: done\ndata: {json.dumps({'event': 'done', 'progress': progress})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 class SearchReleaseRequest(BaseModel):
     artist: str
     album: str
@@ -378,6 +307,69 @@ async def tag_files(albums: list[Album]) -> list[Album]:
 async def organize_files(request: OrganizeRequest) -> dict:
     service = OrganizationService(request.output_path)
     return await service.organize_all(request.albums)
+
+@router.post("/jobs/scan", status_code=202)
+async def submit_scan_job(request: ScanRequest) -> JobInfo:
+    """Background /scan. Albums land in the stored results; page through them with /scan/page."""
+    input_path = Path(request.input_path)
+    if not input_path.exists():
+        raise HTTPException(status_code=404, detail=f"Path not found: {request.input_path}")
+    return get_job_manager().submit("scan", scan_runner(input_path)).info()
+
+@router.post("/jobs/identify", status_code=202)
+async def submit_identify_job(albums: list[Album]) -> JobInfo:
+    return get_job_manager().submit("identify", identify_runner(albums), total=len(albums)).info()
+
+@router.post("/jobs/tag", status_code=202)
+async def submit_tag_job(albums: list[Album]) -> JobInfo:
+    return get_job_manager().submit("tag", tag_runner(albums), total=len(albums)).info()
+
+@router.post("/jobs/organize", status_code=202)
+async def submit_organize_job(request: OrganizeRequest) -> JobInfo:
+    runner = organize_runner(request.albums, request.output_path)
+    return get_job_manager().submit("organize", runner, total=len(request.albums)).info()
+
+@router.get("/jobs")
+async def list_jobs() -> list[JobInfo]:
+    return [job.info() for job in get_job_manager().jobs()]
+
+def _get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> JobInfo:
+    return _get_job(job_id).info()
+
+@router.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str) -> dict:
+    """Per-item results finished so far, in submission order. Identify and tag return the updated albums."""
+    job = _get_job(job_id)
+    return {"job": job.info(), "results": [job.results[index] for index in sorted(job.results)]}
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Server-sent item and status events of one job. The stream ends when the job finishes."""
+    job = _get_job(job_id)
+
+    async def events():
+        with job.subscribe() as queue:
+            status = {"event": "status", "job": job.info().model_dump(mode="json")}
+            yield f"event: status\ndata: {json.dumps(status)}\n\n"
+            if job.finished:
+                return
+            async for chunk in _event_stream(queue):
+                yield chunk
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str) -> JobInfo:
+    _get_job(job_id)
+    return get_job_manager().cancel(job_id).info()
+
 @router.post("/system/shutdown")
 async def shutdown_application():
     import signal
@@ -11,9 +11,66 @@ class Settings(BaseSettings):
     # Paths
     INPUT_DIR: Path = Path("/data/input")
     OUTPUT_DIR: Path = Path("/data/output")
+    CACHE_DIR: Path = Path.home() / ".cache" / "er-musictagmanager"
+
+    # Scanning
+    SCAN_WORKERS: int = 8
+    SCAN_INDEX_ENABLED: bool = True
+    SCAN_TAG_PROBE: bool = True
+    SCAN_DETECT_DUPLICATES: bool = True
+    WATCH_ENABLED: bool = False
+    WATCH_DEBOUNCE_MS: int = 1600
+    # Health pages re-crawl a tree (only re-reading changed folders) once its last full crawl is this old
+    HEALTH_RECRAWL_SECONDS: float = 300.0
+
+    # Thumbnails
+    THUMBNAIL_SIZES: list[int] = [128, 256, 512]
+    THUMBNAIL_CACHE_MB: int = 256
+    # Pictures extracted from audio files; local cover files are served where they are
+    EMBEDDED_COVER_CACHE_MB: int = 256
+
+    # Release covers, downloaded from the Cover Art Archive while albums are identified
+    COVER_PREFETCH_ENABLED: bool = True
+    COVER_PREFETCH_CONCURRENCY: int = 4
+    COVER_CACHE_MB: int = 512
+    COVER_ART_BREAKER_FAILURES: int = 5
+    COVER_ART_BREAKER_RESET_SECONDS: float = 60.0
+
+    # Background jobs
+    JOB_WORKERS: int = 2
+    JOB_HISTORY: int = 50
     
+    # Outbound HTTP
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_VERIFY_TLS: bool = True
+
     # MusicBrainz
     MUSICBRAINZ_USER_AGENT: str = "ER-MusicTagManager/0.1.0 ( contact@example.com )"
+    # Point both at a stand-in (see benchmarks/mock_musicbrainz.py) to identify without musicbrainz.org
+    MUSICBRAINZ_BASE_URL: str = "https://musicbrainz.org/ws/2"
+    COVER_ART_BASE_URL: str = "http://coverartarchive.org"
+    # Requests per second across the whole process, as documented by MusicBrainz
+    MUSICBRAINZ_RATE_LIMIT: float = 1.0
+    MUSICBRAINZ_BURST: int = 1
+    MUSICBRAINZ_QUEUE_SIZE: int = 1000
+    MUSICBRAINZ_MAX_RETRIES: int = 3
+    MUSICBRAINZ_BREAKER_FAILURES: int = 5
+    MUSICBRAINZ_BREAKER_RESET_SECONDS: float = 60.0
+    # Compare track lengths of the top candidates when picking a release
+    MUSICBRAINZ_MATCH_DURATIONS: bool = True
+    MUSICBRAINZ_DURATION_TOLERANCE: float = 3.0
+    MUSICBRAINZ_DURATION_CANDIDATES: int = 3
+    # Artists with at least this many albums to identify are matched from one paged release browse
+    MUSICBRAINZ_BROWSE_MIN_ALBUMS: int = 4
+    MUSICBRAINZ_BROWSE_MAX_PAGES: int = 10
+    # online (web service) or offline (imported dump, see app/services/musicbrainz_offline.py)
+    MUSICBRAINZ_BACKEND: str = "online"
+    MUSICBRAINZ_OFFLINE_DB: Path | None = None
+    MUSICBRAINZ_CACHE_ENABLED: bool = True
+    MUSICBRAINZ_CACHE_SEARCH_TTL_HOURS: float = 24 * 7
+    MUSICBRAINZ_CACHE_LOOKUP_TTL_HOURS: float = 24 * 30
+    MUSICBRAINZ_CACHE_MB: int = 128
     
     # Cors
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
@@ -1,7 +1,11 @@
+from datetime import datetime
 from pathlib import Path
+from typing import Generic, TypeVar
 
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
 
 class MusicFile(BaseModel):
     filename: str
@@ -13,6 +17,8 @@ class MusicFile(BaseModel):
     album: str | None = None
     year: int | None = None
     extended_tags: dict[str, str] = {}
+    duration: float | None = None  # Seconds
+    duplicate_of: str | None = None  # Path of the identical file seen first
 
 class Album(BaseModel):
     id: str # UUID or Scan Path
@@ -28,13 +34,42 @@ class Album(BaseModel):
 
     
     # Identification / Match Status
-    status: str = "Pending"  # Pending, Match, Unclear, NotFound
+    status: str = "Pending"  # Pending, Match, Unclear, NotFound, Duplicate
     mb_release_id: str | None = None
     cover_art_url: str | None = None
     local_cover_path: Path | None = None
+    thumbnail_url: str | None = None
+    duplicate_of: str | None = None  # Path of the album this one is a copy of
     
     @property
     def folder_name(self) -> str:
         # Band Name - Album Name - (Year)
         year_str = f" - ({self.year})" if self.year else ""
         return f"{self.artist} - {self.title}{year_str}"
+
+class LibraryHealthIssue(BaseModel):
+    folder_path: str
+    missing_cover: bool
+    missing_mbid: bool
+    track_count: int
+    found_mbid: str | None = None
+    cover_url: str | None = None  # Served by /covers/{name}
+    thumbnail_url: str | None = None
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None  # Opaque; pass back to get the following page
+    total: int  # Matches across all pages
+    counts: dict[str, int] = {}  # Unfiltered summary, where the endpoint provides one
+
+class JobInfo(BaseModel):
+    id: str
+    kind: str  # scan, identify, tag, organize
+    status: str  # queued, running, completed, failed, cancelled
+    done: int = 0
+    total: int = 0
+    summary: dict | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
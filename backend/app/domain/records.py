@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+from app.domain.models import Album, MusicFile
+
+
+def intern(value: str | None) -> str | None:
+    # Artist, album and extension strings repeat across thousands of files; keep one copy of each
+    return sys.intern(value) if value is not None else None
+
+class FileRecord:
+    """
+    Compact scan state of one audio file. Holds the file name only; the full path is rebuilt
+    from the owning album when the pydantic MusicFile is created for a response.
+    """
+    __slots__ = (
+        'filename', 'extension', 'size_bytes', 'title', 'artist', 'album', 'year', 'mb_album_id', 'duration',
+        'duplicate_of',
+    )
+
+    def __init__(self, filename: str, extension: str, size_bytes: int, title: str | None = None,
+                 artist: str | None = None, album: str | None = None, year: int | None = None,
+                 mb_album_id: str | None = None, duration: float | None = None):
+        self.filename = filename
+        self.extension = intern(extension)
+        self.size_bytes = size_bytes
+        self.title = title
+        self.artist = intern(artist)
+        self.album = intern(album)
+        self.year = year
+        self.mb_album_id = intern(mb_album_id)
+        self.duration = duration
+        self.duplicate_of: str | None = None
+
+    def to_model(self, directory: str) -> MusicFile:
+        return MusicFile(
+            filename=self.filename,
+            path=Path(directory) / self.filename,
+            extension=self.extension,
+            size_bytes=self.size_bytes,
+            title=self.title,
+            artist=self.artist,
+            album=self.album,
+            year=self.year,
+            extended_tags={'musicbrainz_albumid': self.mb_album_id} if self.mb_album_id else {},
+            duration=self.duration,
+            duplicate_of=self.duplicate_of,
+        )
+
+class AlbumRecord:
+    """
+    Compact scan state of one album directory, as produced by ScanService and kept by the scan result store.
+    Attribute names match Album so filters work on either; call to_model() at the API edge.
+    """
+    __slots__ = (
+        'path', 'title', 'artist', 'year', 'files', 'status', 'mb_release_id', 'local_cover_path', 'thumbnail_url',
+        'duplicate_of',
+    )
+
+    def __init__(self, path: str, title: str, artist: str, year: int | None, files: tuple[FileRecord, ...],
+                 status: str = "Pending", mb_release_id: str | None = None, local_cover_path: str | None = None,
+                 thumbnail_url: str | None = None):
+        self.path = path
+        self.title = intern(title)
+        self.artist = intern(artist)
+        self.year = year
+        self.files = files
+        self.status = intern(status)
+        self.mb_release_id = mb_release_id
+        self.local_cover_path = local_cover_path
+        self.thumbnail_url = thumbnail_url
+        self.duplicate_of: str | None = None
+
+    @property
+    def id(self) -> str:
+        return self.path
+
+    def to_model(self) -> Album:
+        return Album(
+            id=self.path,
+            title=self.title,
+            artist=self.artist,
+            year=self.year,
+            path=self.path,
+            files=[file.to_model(self.path) for file in self.files],
+            status=self.status,
+            mb_release_id=self.mb_release_id,
+            local_cover_path=self.local_cover_path,
+            thumbnail_url=self.thumbnail_url,
+            duplicate_of=self.duplicate_of,
+        )
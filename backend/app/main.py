@@ -1,3 +1,4 @@
+import logging
 import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -9,13 +10,36 @@ from fastapi.staticfiles import StaticFiles
 from app.api.endpoints import router as api_router
 from app.core.logging import configure_logging
 from app.core.settings import settings
+from app.services.http_client import close_http_client, get_http_client
+from app.services.jobs import get_job_manager
+from app.services.watcher import LibraryWatcher
 
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
-async def lifespan(_app: FastAPI):
+async def lifespan(app: FastAPI):
     configure_logging()
+
+    # One pooled outbound client for MusicBrainz and cover downloads, kept alive for the app's lifetime
+    get_http_client()
+
+    # Live watch mode keeps /library/events subscribers current without full rescans
+    watcher = None
+    if settings.WATCH_ENABLED:
+        if settings.INPUT_DIR.is_dir():
+            watcher = LibraryWatcher(settings.INPUT_DIR)
+            watcher.start()
+        else:
+            logger.warning(f"Watch mode enabled but {settings.INPUT_DIR} is not a directory")
+    app.state.watcher = watcher
+
     yield
 
+    if watcher:
+        await watcher.stop()
+    await get_job_manager().shutdown()
+    await close_http_client()
+
 app = FastAPI(
     title=settings.APP_NAME,
     lifespan=lifespan,
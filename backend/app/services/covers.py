@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from app.core.settings import settings
+from app.services.disk_budget import DiskBudget
+from app.services.scan_index import ScanIndex, get_scan_index
+
+logger = logging.getLogger(__name__)
+
+# Covers are referenced by URL so health reports stay small; the browser fetches them lazily
+COVER_URL_PREFIX = "/api/v1/covers/"
+
+MIME_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/bmp': 'bmp',
+}
+EXTENSION_MIMES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'bmp': 'image/bmp',
+}
+
+COVER_NAME = re.compile(r'^[0-9a-f]{32}\.(jpg|png|gif|webp|bmp)$')
+
+def cover_url(name: str) -> str:
+    return COVER_URL_PREFIX + name
+
+def cover_mime(name: str) -> str:
+    return EXTENSION_MIMES[name.rsplit('.', 1)[1]]
+
+class CoverStore:
+    """
+    Content-addressed covers, named <blake2b>.<ext> so clients can cache them forever. Local cover
+    files (e.g. folder.jpg) are served where they are: the scan index maps each name back to the file
+    it was hashed from. Only embedded pictures, which have no file of their own, and local covers when
+    the index is off are written under CACHE_DIR/covers; with max_bytes the least recently used are evicted.
+    The index also remembers which source produced which name, so unchanged sources aren't re-hashed.
+    """
+
+    def __init__(self, root: Path | None = None, index: ScanIndex | None = None, max_bytes: int | None = None):
+        self.root = Path(root or settings.CACHE_DIR / "covers")
+        self.index = index
+        self.budget = DiskBudget(self.root, max_bytes) if max_bytes is not None else None
+
+    def path_for(self, name: str) -> Path | None:
+        """Returns the file to serve for a cover name, or None if the name is invalid or unknown."""
+        if not COVER_NAME.match(name):
+            return None
+        path = self.root / name[:2] / name
+        try:
+            # Touch for LRU ordering; also tells us whether it exists
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+        return self._local_source(name)
+
+    def _local_source(self, name: str) -> Path | None:
+        # Several folders may hold the same image; any of them that is still unchanged will do
+        if not self.index:
+            return None
+        for source, size, mtime_ns in self.index.cover_files(name):
+            try:
+                stat = os.stat(source)
+            except OSError:
+                continue
+            if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                return Path(source)
+        return None
+
+    def add_file(self, path: Path) -> str | None:
+        """
+        Registers a cover image file (e.g. folder.jpg) and returns its cover name. With the scan index the
+        file is served in place; without it nothing maps the name back, so it is copied into the store.
+        """
+        try:
+            stat = path.stat()
+            name = self.remembered(path, stat.st_size, stat.st_mtime_ns)
+            if name:
+                return name
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    digest.update(chunk)
+            ext = path.suffix.lower().lstrip('.')
+            name = f"{digest.hexdigest()}.{'jpg' if ext == 'jpeg' else ext}"
+            if not COVER_NAME.match(name):
+                return None
+            if self.index:
+                self._remember(path, stat, name, local=True)
+            elif self._write(name, lambda tmp: shutil.copyfile(path, tmp)) and self.budget:
+                self.budget.account(stat.st_size)
+            return name
+        except OSError as e:
+            logger.warning(f"Could not register cover {path}: {e}")
+            return None
+
+    def add_embedded(self, source: Path, mime: str, data: bytes) -> str | None:
+        """Registers a picture extracted from the audio file source and returns its cover name."""
+        try:
+            name = self.add_data(mime, data)
+            self._remember(source, source.stat(), name)
+            return name
+        except OSError as e:
+            logger.warning(f"Could not cache embedded cover of {source}: {e}")
+            return None
+
+    def add_data(self, mime: str, data: bytes) -> str:
+        """Stores image bytes and returns their cover name. Raises OSError if the cache can't be written."""
+        ext = MIME_EXTENSIONS.get((mime or '').lower().split(';')[0].strip(), 'jpg')
+        name = f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.{ext}"
+        if self._write(name, lambda tmp: Path(tmp).write_bytes(data)) and self.budget:
+            self.budget.account(len(data))
+        return name
+
+    def remembered(self, source: Path, size: int, mtime_ns: int) -> str | None:
+        """Returns the cover name of an unchanged source whose cover can still be served."""
+        if not self.index:
+            return None
+        name = self.index.lookup_cover(str(source), size, mtime_ns)
+        return name if name and self.path_for(name) else None
+
+    def _remember(self, source: Path, stat: os.stat_result, name: str, local: bool = False):
+        if self.index:
+            try:
+                self.index.store_cover(str(source), stat.st_size, stat.st_mtime_ns, name, local)
+            except Exception as e:
+                logger.warning(f"Could not record cover of {source}: {e}")
+
+    def _write(self, name: str, writer) -> bool:
+        """Writes a cover unless it is already stored; returns whether it wrote one."""
+        target = self.root / name[:2] / name
+        if target.is_file():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write beside the target and rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        os.close(fd)
+        try:
+            writer(tmp)
+            os.replace(tmp, target)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return True
+
+_store: CoverStore | None = None
+
+def get_cover_store() -> CoverStore:
+    global _store
+    if _store is None:
+        _store = CoverStore(index=get_scan_index(), max_bytes=settings.EMBEDDED_COVER_CACHE_MB * 1024 * 1024)
+    return _store
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = {'.mp3', '.flac', '.wav', '.m4a', '.ogg'}
+COMMON_COVERS = ['cover.jpg', 'cover.png', 'folder.jpg', 'folder.png', 'front.jpg', 'front.png']
+
+class AudioEntry(NamedTuple):
+    name: str
+    size: int
+    mtime_ns: int
+
+class DirectoryListing(NamedTuple):
+    path: Path
+    audio_files: list[AudioEntry]
+    cover: str | None
+    fingerprint: str
+
+def find_cover(names: list[str]) -> str | None:
+    """
+    Picks the local cover file by COMMON_COVERS priority with one lowercase lookup per candidate.
+    An exact-case match wins over a differently cased one.
+    """
+    by_lower = {}
+    for name in names:
+        lower = name.lower()
+        if lower not in by_lower or name == lower:
+            by_lower[lower] = name
+    for cover_name in COMMON_COVERS:
+        if cover_name in by_lower:
+            return by_lower[cover_name]
+    return None
+
+def fingerprint(dir_mtime_ns: int, names: list[str], audio_files: list[AudioEntry]) -> str:
+    """
+    Summarises a directory listing. The directory mtime and names catch added, removed and renamed
+    entries; the audio stats catch files rewritten in place (tag edits don't touch the directory mtime).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(dir_mtime_ns).encode())
+    for name in sorted(names):
+        digest.update(b'\0' + name.encode('utf-8', 'surrogateescape'))
+    for entry in sorted(audio_files):
+        digest.update(f'\0{entry.name}:{entry.size}:{entry.mtime_ns}'.encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+def _scan_one(directory: Path) -> tuple[DirectoryListing | None, list[Path]]:
+    subdirs = []
+    names = []
+    audio_files = []
+    dir_mtime_ns = directory.stat().st_mtime_ns
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(Path(entry.path))
+                    continue
+            except OSError:
+                continue
+            names.append(entry.name)
+            if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                try:
+                    stat = entry.stat()
+                except OSError as e:
+                    logger.warning(f"Cannot stat {entry.path}: {e}")
+                    continue
+                audio_files.append(AudioEntry(entry.name, stat.st_size, stat.st_mtime_ns))
+
+    listing = None
+    if audio_files:
+        listing = DirectoryListing(
+            path=directory,
+            audio_files=audio_files,
+            cover=find_cover(names),
+            fingerprint=fingerprint(dir_mtime_ns, names + [p.name + os.sep for p in subdirs], audio_files),
+        )
+    return listing, subdirs
+
+def list_directory(directory: Path) -> DirectoryListing | None:
+    """Lists a single directory without descending. Returns None if it holds no audio or is gone."""
+    try:
+        return _scan_one(Path(directory))[0]
+    except OSError:
+        return None
+
+def crawl(root: Path):
+    """
+    Walks root top-down in os.walk order with os.scandir, yielding a DirectoryListing for every
+    directory that contains audio files. Audio stats come from the DirEntry, so callers don't
+    need to stat files again. Like os.walk, symlinked directories are not followed.
+    """
+    stack = [Path(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            listing, subdirs = _scan_one(current)
+        except OSError as e:
+            logger.warning(f"Cannot list {current}: {e}")
+            continue
+
+        # Reverse so the first listed subdirectory is visited first, matching os.walk
+        stack.extend(reversed(subdirs))
+
+        if listing:
+            yield listing
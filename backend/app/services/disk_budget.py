@@ -0,0 +1,49 @@
+import os
+import threading
+from pathlib import Path
+
+
+class DiskBudget:
+    """
+    Keeps a bucketed cache directory (root/<xx>/<file>) under a byte budget. Callers touch files
+    when they use them and report what they write; once the total grows past max_bytes the least
+    recently used files are deleted until it is back at 90% of the budget.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def account(self, written: int):
+        """Adds freshly written bytes to the total, evicting if the budget is exceeded."""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._total_bytes += written
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        if not self.root.is_dir():
+            return
+        for bucket in os.scandir(self.root):
+            if bucket.is_dir():
+                # Skip files still being written beside their target
+                yield from (entry for entry in os.scandir(bucket.path) if not entry.name.startswith('.tmp-'))
+
+    def _evict(self):
+        entries = sorted((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in self._entries())
+        target = self.max_bytes * 0.9
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
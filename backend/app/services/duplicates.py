@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import struct
+from collections import defaultdict
+from pathlib import Path
+
+from app.domain.records import AlbumRecord
+from app.services.scan_index import ScanIndex
+from app.services.tag_probe import skip_id3v2
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed from each end of the audio payload before falling back to a full hash
+QUICK_HASH_CHUNK = 64 * 1024
+FULL_HASH_CHUNK = 1024 * 1024
+
+def _trailing_tags(f, end: int) -> int:
+    """Moves end in front of an ID3v1 tag and/or an APEv2 tag at the end of the file."""
+    if end >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b'TAG':
+            end -= 128
+    if end >= 32:
+        f.seek(end - 32)
+        footer = f.read(32)
+        if footer[:8] == b'APETAGEX':
+            size, _, flags = struct.unpack('<III', footer[12:24])
+            end -= size + (32 if flags & 0x80000000 else 0)
+    return max(end, 0)
+
+def _flac_payload(f, start: int) -> int:
+    f.seek(start)
+    if f.read(4) != b'fLaC':
+        return start
+    offset = start + 4
+    while True:
+        header = f.read(4)
+        if len(header) < 4:
+            return offset
+        offset += 4 + int.from_bytes(header[1:4], 'big')
+        if header[0] & 0x80:
+            return offset
+        f.seek(offset)
+
+def _box_payload(f, size: int, container: bytes, payload: bytes, header_size: int) -> tuple[int, int] | None:
+    """Returns the largest top-level payload box (mdat, RIFF data) of a box/chunk structured file."""
+    best = None
+    offset = header_size
+    while offset + 8 <= size:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            break
+        if container == b'mp4':
+            box_size, box_type, body = struct.unpack('>I', header[:4])[0], header[4:8], 8
+            if box_size == 1 and len(header) == 16:
+                box_size, body = struct.unpack('>Q', header[8:16])[0], 16
+            elif box_size == 0:
+                box_size = size - offset
+        else:
+            box_type, box_size, body = header[:4], struct.unpack('<I', header[4:8])[0] + 8, 8
+            box_size += box_size % 2
+        if box_size < body:
+            break
+        if box_type == payload and (best is None or box_size - body > best[1] - best[0]):
+            best = (offset + body, min(offset + box_size, size))
+        offset += box_size
+    return best
+
+def payload_range(path: Path, size: int) -> tuple[int, int]:
+    """
+    Returns the [start, end) byte range holding the audio of a file, excluding tag regions,
+    so copies that only differ in their tags hash the same. Unknown layouts cover the whole file.
+    """
+    ext = path.suffix.lower()
+    with open(path, 'rb') as f:
+        if ext in ('.mp3', '.flac'):
+            start = skip_id3v2(f)
+            if ext == '.flac':
+                start = _flac_payload(f, start)
+            return start, max(start, _trailing_tags(f, size))
+        if ext == '.m4a':
+            return _box_payload(f, size, b'mp4', b'mdat', 0) or (0, size)
+        if ext == '.wav':
+            f.seek(0)
+            if f.read(4) == b'RIFF':
+                return _box_payload(f, size, b'riff', b'data', 12) or (0, size)
+    return 0, size
+
+def _hash_range(path: Path, start: int, end: int, quick: bool) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(end - start).encode())
+    with open(path, 'rb') as f:
+        if quick and end - start > 2 * QUICK_HASH_CHUNK:
+            f.seek(start)
+            digest.update(f.read(QUICK_HASH_CHUNK))
+            f.seek(end - QUICK_HASH_CHUNK)
+            digest.update(f.read(QUICK_HASH_CHUNK))
+        else:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(FULL_HASH_CHUNK, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+class DuplicateDetector:
+    """
+    Flags identical audio across scanned albums without hashing every byte: files are bucketed
+    by payload size, same-size files compare hashes of the payload's head and tail, and only
+    those collisions get a full payload hash. Payload ranges and hashes are kept in the scan index.
+    """
+
+    def __init__(self, index: ScanIndex | None = None):
+        self.index = index
+
+    def flag(self, albums: list[AlbumRecord]) -> list[AlbumRecord]:
+        """
+        Sets duplicate_of on files and albums in place and returns the albums that got flagged.
+        The first copy in path order is the original. An album is a duplicate when each of its tracks
+        is a copy of a track in one other album.
+        """
+        entries = []
+        for album in albums:
+            cached = self.index.lookup_directory(album.path)[1] if self.index else {}
+            for file in album.files:
+                path = os.path.join(album.path, file.filename)
+                row = dict(cached.get(path) or {'path': path, 'size': file.size_bytes})
+                entries.append((album, file, row))
+
+        updated = {}
+        by_length = defaultdict(list)
+        for entry in entries:
+            row = entry[2]
+            if row.get('payload_start') is None:
+                try:
+                    row['payload_start'], row['payload_end'] = payload_range(Path(row['path']), row['size'])
+                    updated[row['path']] = row
+                except OSError as e:
+                    logger.warning(f"Cannot read {row['path']} for duplicate detection: {e}")
+                    continue
+            by_length[row['payload_end'] - row['payload_start']].append(entry)
+
+        groups = [bucket for bucket in by_length.values() if len(bucket) > 1]
+        for key, quick in (('quick_hash', True), ('full_hash', False)):
+            next_groups = []
+            for bucket in groups:
+                by_hash = defaultdict(list)
+                for entry in bucket:
+                    row = entry[2]
+                    if row.get(key) is None:
+                        try:
+                            row[key] = _hash_range(Path(row['path']), row['payload_start'], row['payload_end'], quick)
+                        except OSError as e:
+                            logger.warning(f"Cannot hash {row['path']}: {e}")
+                            continue
+                        updated[row['path']] = row
+                    by_hash[row[key]].append(entry)
+                next_groups += [same for same in by_hash.values() if len(same) > 1]
+            groups = next_groups
+
+        for group in groups:
+            group.sort(key=lambda entry: entry[2]['path'])
+            original = group[0][2]['path']
+            for _, file, _ in group[1:]:
+                file.duplicate_of = original
+
+        if self.index and updated:
+            try:
+                self.index.update_content([row for row in updated.values() if 'mtime_ns' in row])
+            except Exception as e:
+                logger.warning(f"Could not store content hashes: {e}")
+
+        return self._flag_albums(albums, entries)
+
+    def _flag_albums(self, albums: list[AlbumRecord], entries: list) -> list[AlbumRecord]:
+        album_of = {entry[2]['path']: entry[0] for entry in entries}
+        flagged = []
+        for album in albums:
+            if not album.files or any(file.duplicate_of is None for file in album.files):
+                continue
+            originals = {album_of[file.duplicate_of].path for file in album.files}
+            if len(originals) == 1 and album.path not in originals:
+                album.duplicate_of = originals.pop()
+                album.status = "Duplicate"
+                flagged.append(album)
+        return flagged
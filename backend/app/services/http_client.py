@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a server-requested pause, so a bogus header can't stall a batch for hours
+MAX_RETRY_AFTER = 300.0
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a service is considered down."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `threshold` failures in a row the circuit opens and
+    requests fail immediately; once `reset_after` seconds have passed one trial request is let through,
+    and its outcome closes the circuit or opens it for another period.
+    """
+
+    def __init__(self, name: str, threshold: int | None = None, reset_after: float | None = None):
+        self.name = name
+        self.threshold = threshold or settings.MUSICBRAINZ_BREAKER_FAILURES
+        self.reset_after = reset_after or settings.MUSICBRAINZ_BREAKER_RESET_SECONDS
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_after else "half-open"
+
+    def check(self):
+        state = self.state
+        if state == "open":
+            remaining = self.reset_after - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(f"{self.name} is unavailable, not retrying for another {remaining:.0f}s")
+        if state == "half-open":
+            # Let this request through as the trial; everyone else keeps failing fast until it reports back
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"{self.name} is reachable again, closing circuit")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning(f"{self.name} failed {self.failures} times in a row, opening circuit")
+            self.opened_at = time.monotonic()
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key starts the work, later callers
+    await the same result. The shared call is cancelled only once every caller waiting on it is gone.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, factory):
+        """Returns the result of factory() (a coroutine function), shared with identical in-flight calls."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+def retry_after(response: httpx.Response, default: float) -> float:
+    """Returns the pause requested by a Retry-After header (seconds or HTTP date), or default."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return default
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds()
+        except (TypeError, ValueError):
+            return default
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_breakers: dict[str, CircuitBreaker] = {}
+_flights: dict[str, SingleFlight] = {}
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the app-wide outbound client: pooled keep-alive connections and HTTP/2, so repeated
+    MusicBrainz and Cover Art Archive requests reuse one TLS session. Created in the app lifespan.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=settings.HTTP_TIMEOUT,
+            verify=settings.HTTP_VERIFY_TLS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+async def close_http_client():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+def get_circuit_breaker(name: str, threshold: int | None = None, reset_after: float | None = None) -> CircuitBreaker:
+    """Returns the shared breaker of a service; thresholds apply when it is first created."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, threshold, reset_after)
+    return _breakers[name]
+
+def get_single_flight(name: str) -> SingleFlight:
+    if name not in _flights:
+        _flights[name] = SingleFlight()
+    return _flights[name]
@@ -1,17 +1,157 @@
 import asyncio
 import contextlib
+import difflib
 import logging
+import time
 
 import httpx
 
+from app.core.settings import settings
 from app.domain.models import Album
+from app.services.http_client import (
+    CircuitBreaker,
+    SingleFlight,
+    get_circuit_breaker,
+    get_http_client,
+    get_single_flight,
+    retry_after,
+)
+from app.services.matching import duration_scores, release_durations
+from app.services.musicbrainz_cache import MusicBrainzCache, get_musicbrainz_cache, request_key
+from app.services.musicbrainz_offline import MusicBrainzOfflineIndex, get_offline_index, normalize
+from app.services.musicbrainz_scheduler import BULK, INTERACTIVE, MusicBrainzScheduler, get_musicbrainz_scheduler
+from app.services.musicbrainz_schema import Release, as_release, decode_release, encode_release
+from app.services.release_covers import cover_art_url, get_release_covers
 
 logger = logging.getLogger(__name__)
 
+# Duration fit above which the top-ranked candidate is taken without looking up the runners-up
+DURATION_ACCEPT = 0.9
+
+# Release browse: everything _parse_details_into_album needs, so browsed releases need no lookup
+BROWSE_INC = "recordings+artist-credits+labels+isrcs+release-groups"
+BROWSE_PAGE_SIZE = 100
+
 class IdentificationService:
-    BASE_URL = "https://musicbrainz.org/ws/2"
     USER_AGENT = "ER-MusicTagManager/1.0.0 ( contact@example.com )"
 
+    # Answers that mean "try again later" rather than "no such thing"
+    RETRY_STATUSES = {429, 502, 503, 504}
+
+    def __init__(self, cache: MusicBrainzCache | None = None, scheduler: MusicBrainzScheduler | None = None,
+                 breaker: CircuitBreaker | None = None, offline: MusicBrainzOfflineIndex | None = None):
+        self.base_url = settings.MUSICBRAINZ_BASE_URL.rstrip("/")
+        self.cache = cache or get_musicbrainz_cache()
+        self.scheduler = scheduler or get_musicbrainz_scheduler()
+        self.breaker = breaker or get_circuit_breaker("MusicBrainz")
+        self.in_flight: SingleFlight = get_single_flight("MusicBrainz")
+        # With an imported dump every search and lookup is answered locally; no requests, no rate limit.
+        # Local lookups take well under a millisecond, so they run inline rather than via an executor.
+        self.offline = offline or get_offline_index()
+
+    async def _get(self, client: httpx.AsyncClient, path: str, params: dict, lane: str) -> httpx.Response:
+        """
+        Sends one MusicBrainz request through the scheduler. Overload answers are retried after the
+        server's Retry-After (or an exponential backoff), which holds back every queued request too.
+        Raises CircuitOpenError without sending anything while MusicBrainz is considered down.
+        """
+        headers = {"User-Agent": self.USER_AGENT, "Accept": "application/json"}
+        max_retries = settings.MUSICBRAINZ_MAX_RETRIES
+        backoff = 1.0
+
+        for attempt in range(max_retries + 1):
+            self.breaker.check()
+            # Every MusicBrainz request waits for a permit; the scheduler enforces the rate limit
+            await self.scheduler.acquire(lane)
+            try:
+                response = await client.get(f"{self.base_url}/{path}", params=params, headers=headers)
+            except (httpx.TimeoutException, httpx.RequestError) as e:
+                self.breaker.record_failure()
+                if attempt == max_retries or self.breaker.state == "open":
+                    raise
+                logger.warning(f"MusicBrainz Network Error: {e}. Retrying in {backoff}s...")
+                await asyncio.sleep(backoff)
+                backoff *= 2
+                continue
+
+            if response.status_code not in self.RETRY_STATUSES:
+                self.breaker.record_success()
+                return response
+
+            self.breaker.record_failure()
+            if attempt == max_retries or self.breaker.state == "open":
+                return response
+            delay = retry_after(response, backoff)
+            logger.warning(
+                f"MusicBrainz {response.status_code} (Attempt {attempt+1}/{max_retries}). "
+                f"Retrying in {delay}s..."
+            )
+            self.scheduler.defer(delay)
+            backoff *= 2
+        return response
+
+    async def _fetch_json(self, client: httpx.AsyncClient, path: str, params: dict,
+                          lane: str) -> tuple[int, dict | None]:
+        """
+        Returns (status, parsed body) for a MusicBrainz GET, from the cache if possible. Concurrent
+        identical requests (same normalized key) share one outstanding request and one parsed body.
+        """
+        cached = await self._cached(path, params)
+        if cached is not None:
+            return 200, cached
+
+        async def request() -> tuple[int, dict | None]:
+            response = await self._get(client, path, params, lane)
+            if response.status_code != 200:
+                return response.status_code, None
+            data = response.json()
+            await self._store(path, params, data)
+            return 200, data
+
+        return await self.in_flight.run(request_key(path, params), request)
+
+    async def _fetch_release(self, client: httpx.AsyncClient, mb_release_id: str, params: dict,
+                             lane: str) -> tuple[int, Release | None]:
+        """
+        Release lookup decoded straight into a typed Release, like _fetch_json otherwise. Lookups of
+        box sets run to megabytes; only the fields we use are decoded, and only those are cached.
+        """
+        if self.offline:
+            details = self.offline.release(mb_release_id)
+            return 200, as_release(details) if details is not None else None
+
+        path = f"release/{mb_release_id}"
+        cached = await self._cached(path, params, raw=True)
+        if cached is not None:
+            return 200, decode_release(cached)
+
+        async def request() -> tuple[int, Release | None]:
+            response = await self._get(client, path, params, lane)
+            if response.status_code != 200:
+                return response.status_code, None
+            release = decode_release(response.content)
+            await self._store(path, params, encode_release(release))
+            return 200, release
+
+        # Keyed apart from _fetch_json, which would share a dict rather than a Release
+        return await self.in_flight.run(f"typed:{request_key(path, params)}", request)
+
+    async def _cached(self, path: str, params: dict, raw: bool = False) -> dict | str | bytes | None:
+        # The cache is SQLite; like the scan index it is only touched from worker threads
+        if not self.cache:
+            return None
+        lookup = self.cache.get_raw if raw else self.cache.get
+        return await asyncio.get_running_loop().run_in_executor(None, lookup, path, params)
+
+    async def _store(self, path: str, params: dict, data: dict | bytes):
+        """Caches a parsed body, or an already encoded one as is. Writes may evict, so they run on a worker thread."""
+        if self.cache:
+            put = self.cache.put_raw if isinstance(data, bytes) else self.cache.put
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, put, path, params, data)
+            except Exception as e:
+                logger.warning(f"Could not cache MusicBrainz response for {path}: {e}")
+
     async def search_releases(self, artist: str, release: str, limit: int = 50) -> list[dict]:
         """
         Public method to search for releases manually.
@@ -23,164 +163,151 @@ class IdentificationService:
             "fmt": "json",
             "limit": limit
         }
-        headers = {"User-Agent": self.USER_AGENT, "Accept": "application/json"}
-        
-        async with httpx.AsyncClient(verify=False, timeout=10.0) as client:
-             # Simple retry logic could be added here similar to identify_album
-            try:
-                response = await client.get(f"{self.BASE_URL}/release", params=params, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("releases", [])
-            except Exception as e:
-                logger.error(f"Search failed: {e}")
+        try:
+            if self.offline:
+                data = self.offline.search(artist, release, None, limit)
+                return data["releases"]
+            _, data = await self._fetch_json(get_http_client(), "release", params, INTERACTIVE)
+            if data is not None:
+                return data.get("releases", [])
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
         return []
 
-    async def resolve_release(self, album: Album, mb_release_id: str) -> Album:
+    async def resolve_release(self, album: Album, mb_release_id: str, lane: str = INTERACTIVE) -> Album:
         """
         Manually resolves an album using a specific MusicBrainz Release ID.
         Forces the album status to 'Match' and populates metadata.
         """
-        headers = {"User-Agent": self.USER_AGENT, "Accept": "application/json"}
         lookup_params = {
             "inc": "recordings+artist-credits+labels+isrcs+release-groups+url-rels+tags+genres"
         }
         
-        async with httpx.AsyncClient(verify=False, timeout=10.0) as client:
-            try:
-                # 1. Fetch Details
-                det_resp = await client.get(
-                    f"{self.BASE_URL}/release/{mb_release_id}", 
-                    params=lookup_params, 
-                    headers=headers
-                )
+        try:
+            # 1. Fetch Details
+            status, details = await self._fetch_release(get_http_client(), mb_release_id, lookup_params, lane)
+            
+            if details is not None:
+                album.mb_release_id = details.id
+                album.title = details.title
                 
-                if det_resp.status_code == 200:
-                    details = det_resp.json()
-                    album.mb_release_id = details.get("id")
-                    album.title = details.get("title")
-                    
-                    if "artist-credit" in details:
-                        album.artist = details["artist-credit"][0]["name"]
+                if details.artist_credit:
+                    album.artist = details.artist_credit[0].name
 
-                    # Populate Extended Metadata (Refactored logic could go here)
-                    # For now duplication of logic from identify_album is acceptable or we extract it
-                    self._parse_details_into_album(album, details)
-                    
-                    album.status = "Match"
-                    
-                    # Cover Art
-                    with contextlib.suppress(Exception):
-                        album.cover_art_url = f"http://coverartarchive.org/release/{album.mb_release_id}/front"
-                else:
-                    album.status = f"API Error: {det_resp.status_code}"
-                    
-            except Exception as e:
-                logger.error(f"Resolve failed: {e}")
-                album.status = f"Error: {str(e)}"
-        
+                # Populate Extended Metadata (Refactored logic could go here)
+                # For now duplication of logic from identify_album is acceptable or we extract it
+                self._parse_details_into_album(album, details)
+                
+                album.status = "Match"
+                
+                # Cover Art
+                with contextlib.suppress(Exception):
+                    album.cover_art_url = cover_art_url(album.mb_release_id)
+                self._prefetch_cover(album, details.cover_art_archive.front if details.cover_art_archive else True)
+            elif status == 200:
+                album.status = "NotFound"
+            else:
+                album.status = f"API Error: {status}"
+                
+        except Exception as e:
+            logger.error(f"Resolve failed: {e}")
+            album.status = f"Error: {str(e)}"
+    
         return album
 
-    def _parse_details_into_album(self, album: Album, details: dict):
+    def _parse_details_into_album(self, album: Album, details: Release):
         """Helper to parse MB release details into Album model"""
         meta = {}
         
         # Basic Info
-        meta['musicbrainz_albumid'] = details.get('id', '')
-        meta['barcode'] = details.get('barcode', '')
-        meta['asin'] = details.get('asin', '')
-        meta['releasestatus'] = details.get('status', '') 
-        meta['releasecountry'] = details.get('country', '')
+        meta['musicbrainz_albumid'] = details.id
+        meta['barcode'] = details.barcode
+        meta['asin'] = details.asin
+        meta['releasestatus'] = details.status
+        meta['releasecountry'] = details.country
         
         # Script
-        if 'text-representation' in details:
-            meta['script'] = details['text-representation'].get('script', '')
+        if details.text_representation:
+            meta['script'] = details.text_representation.script
         
         # Label
-        if 'label-info' in details and details['label-info']:
-            li = details['label-info'][0]
-            if 'label' in li:
-                meta['label'] = li['label'].get('name', '')
-                meta['catalognumber'] = li.get('catalog-number', '')
+        if details.label_info:
+            li = details.label_info[0]
+            if li.label:
+                meta['label'] = li.label.name
+                meta['catalognumber'] = li.catalog_number
         
         # Date
-        date_str = details.get('date', '')
+        date_str = details.date or ''
         if date_str and date_str[:4].isdigit():
              album.year = int(date_str[:4])
         meta['date'] = date_str
         meta['originaldate'] = date_str
         
         # Release Group
-        if 'release-group' in details:
-            rg = details['release-group']
-            meta['musicbrainz_releasegroupid'] = rg.get('id', '')
-            meta['musicbrainz_primarytype'] = rg.get('primary-type', '')
-            meta['releasetype'] = rg.get('primary-type', '')
+        if details.release_group:
+            rg = details.release_group
+            meta['musicbrainz_releasegroupid'] = rg.id
+            meta['musicbrainz_primarytype'] = rg.primary_type
+            meta['releasetype'] = rg.primary_type
             
-            first_date = rg.get('first-release-date', '')
+            first_date = rg.first_release_date
             if first_date:
                 meta['originalyear'] = first_date[:4]
                 meta['originaldate'] = first_date
 
         # Artist IDs & Multi-Value Artists
-        if 'artist-credit' in details and details['artist-credit']:
-            ac_list = details['artist-credit']
+        if details.artist_credit:
+            ac_list = details.artist_credit
             ac = ac_list[0]
-            if 'artist' in ac:
-                meta['musicbrainz_artistid'] = ac['artist'].get('id', '')
-                meta['musicbrainz_albumartistid'] = ac['artist'].get('id', '')
-                meta['albumartist'] = ac['artist'].get('name', '')
+            if ac.artist:
+                meta['musicbrainz_artistid'] = ac.artist.id
+                meta['musicbrainz_albumartistid'] = ac.artist.id
+                meta['albumartist'] = ac.artist.name
                 
-            artists_sort = [item['artist']['sort-name'] for item in ac_list if 'artist' in item]
+            artists_sort = [item.artist.sort_name for item in ac_list if item.artist]
             meta['artistsort'] = '; '.join(artists_sort)
             
-            artists = [item['artist']['name'] for item in ac_list if 'artist' in item]
+            artists = [item.artist.name for item in ac_list if item.artist]
             meta['artists'] = '; '.join(artists)
 
         # Tags / Genres
-        if 'tags' in details:
-            tags = [t['name'] for t in details['tags']]
+        if details.tags:
+            tags = [t.name for t in details.tags]
             meta['genre'] = '; '.join(tags) # Map tags to genre for simple compatibility
             meta['tags'] = '; '.join(tags)
 
-        if 'genres' in details:
+        if details.genres:
              # If genres specific field exists (modern MB)
-             genres = [g['name'] for g in details['genres']]
-             if genres:
-                 meta['genre'] = '; '.join(genres)
+             meta['genre'] = '; '.join(g.name for g in details.genres)
 
         # Media / Discs / Tracks
-        if 'media' in details:
+        if details.media:
             tracks_data = []
-            total_discs = len(details['media'])
-            meta['totaldiscs'] = str(total_discs)
+            meta['totaldiscs'] = str(len(details.media))
             
-            for current_disc, medium in enumerate(details['media'], start=1):
-                if current_disc == 1:
-                    meta['media'] = medium.get('format', '')
-                    meta['discnumber'] = str(medium.get('position', '1'))
-                    meta['totaltracks'] = str(medium.get('track-count', ''))
-
-                if 'tracks' in medium:
-                    for track in medium['tracks']:
-                        t_meta = {}
-                        t_meta['musicbrainz_trackid'] = track.get('id', '')
-                        t_meta['title'] = track.get('title', '')
-                        if 'artist-credit' in track:
-                             t_meta['artist'] = track['artist-credit'][0]['name']
-                        elif 'artist-credit' in medium: # sometimes on medium level? unlikley but check schema
-                             pass
-                        
-                        if 'recording' in track:
-                            t_meta['musicbrainz_recordingid'] = track['recording'].get('id', '')
-                        tracks_data.append(t_meta)
+            first = details.media[0]
+            meta['media'] = first.format
+            meta['discnumber'] = str(first.position or 1)
+            meta['totaltracks'] = '' if first.track_count is None else str(first.track_count)
+
+            for medium in details.media:
+                for track in medium.tracks:
+                    t_meta = {}
+                    t_meta['musicbrainz_trackid'] = track.id
+                    t_meta['title'] = track.title
+                    if track.artist_credit:
+                        t_meta['artist'] = track.artist_credit[0].name
+                    if track.recording:
+                        t_meta['musicbrainz_recordingid'] = track.recording.id
+                    tracks_data.append(t_meta)
             
             album.tracks_metadata = tracks_data
         
         album.extended_metadata = {k: v for k, v in meta.items() if v}
 
 
-    async def identify_album(self, album: Album, client: httpx.AsyncClient | None = None) -> Album:
+    async def identify_album(self, album: Album, client: httpx.AsyncClient | None = None, lane: str = BULK) -> Album:
         """
         Queries MusicBrainz for the best matching release based on Artist and Album Title.
         Updates the album status and metadata if a high-confidence match is found.
@@ -189,8 +316,6 @@ class IdentificationService:
             album.status = "Unclear"
             return album
 
-        headers = {"User-Agent": self.USER_AGENT, "Accept": "application/json"}
-        
         # Lucene search query
         query = f'artist:"{album.artist}" AND release:"{album.title}"'
         if album.year:
@@ -202,48 +327,15 @@ class IdentificationService:
             "limit": 10
         }
 
-        should_close = False
-        if client is None:
-            active_client = httpx.AsyncClient(verify=False, timeout=10.0)
-            should_close = True
-        else:
-            active_client = client
+        active_client = client or get_http_client()
 
         try:
-            # Retry loop for API resilience
-            max_retries = 3
-            backoff = 1.0
-            response = None
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    response = await active_client.get(f"{self.BASE_URL}/release", params=params, headers=headers)
-                    
-                    if response.status_code == 503 and attempt < max_retries:
-                        logger.warning(
-                            f"MusicBrainz 503 (Attempt {attempt+1}/{max_retries}). "
-                            f"Retrying in {backoff}s..."
-                        )
-                        await asyncio.sleep(backoff)
-                        backoff *= 2
-                        continue
-                    
-                    break # Success or non-retriable status
-
-                except (httpx.TimeoutException, httpx.RequestError) as e:
-                    if attempt < max_retries:
-                        logger.warning(f"MusicBrainz Network Error: {e}. Retrying in {backoff}s...")
-                        await asyncio.sleep(backoff)
-                        backoff *= 2
-                    else:
-                        raise e
-            
-            if not response:
-                 album.status = "API Error: No Response"
-                 return album
+            if self.offline:
+                status, data = 200, self.offline.search(album.artist, album.title, album.year)
+            else:
+                status, data = await self._fetch_json(active_client, "release", params, lane)
                 
-            if response.status_code == 200:
-                data = response.json()
+            if data is not None:
                 releases = data.get("releases", [])
                 
                 # Filter for high confidence candidates
@@ -252,83 +344,240 @@ class IdentificationService:
                 if candidates:
                     # Smart Selection Logic
                     file_count = len(album.files)
-                    
-                    def score_candidate(release):
-                        track_count = int(release.get("track-count", 0))
-                        diff = abs(track_count - file_count)
-                        has_cover = 0
-                        if "cover-art-archive" in release and release["cover-art-archive"].get("front", False):
-                            has_cover = 1
-                        score_val = int(release.get("score", "0"))
-                        return (diff, -has_cover, -score_val)
-
-                    candidates.sort(key=score_candidate)
-                    match = candidates[0]
-                    
-                    if True:
-                        album.mb_release_id = match.get("id")
-                        album.title = match.get("title")
-                        if "artist-credit" in match:
-                             album.artist = match["artist-credit"][0]["name"]
-                            
-                        # Secondary Lookup utilizing _parse_details_into_album
+                    candidates.sort(key=lambda release: self._candidate_rank(release, file_count))
+                    match, details = candidates[0], None
+                    durations = [file.duration for file in album.files]
+                    if settings.MUSICBRAINZ_MATCH_DURATIONS and any(durations) and len(candidates) > 1:
                         try:
-                            lookup_params = {
-                                "inc": "recordings+artist-credits+labels+isrcs+release-groups+url-rels"
-                            }
-                            await asyncio.sleep(1.1)
-                            
-                            det_resp = await active_client.get(
-                                f"{self.BASE_URL}/release/{album.mb_release_id}", 
-                                params=lookup_params, 
-                                headers=headers
-                            )
-                            
-                            if det_resp.status_code == 200:
-                                self._parse_details_into_album(album, det_resp.json())
-                                
+                            match, details = await self._pick_by_durations(candidates, durations, active_client, lane)
                         except Exception as e:
-                            logger.warning(f"Secondary lookup failed for {album.title}: {repr(e)}")
-
-                        album.status = "Match"
-                        
-                        # Fetch Cover Art URL
+                            logger.warning(f"Duration matching failed for {album.title}: {repr(e)}")
+                    
+                    # Secondary Lookup utilizing _parse_details_into_album
+                    if details is None:
                         try:
-                            # Optimistic: http://coverartarchive.org/release/{mbid}/front
-                            album.cover_art_url = f"http://coverartarchive.org/release/{album.mb_release_id}/front"
+                            details = await self._release_details(active_client, match.get("id"), lane)
                         except Exception as e:
-                            logger.warning(f"Could not determine cover art URL: {repr(e)}")
+                            logger.warning(f"Secondary lookup failed for {album.title}: {repr(e)}")
 
-                    else:
-                        album.status = "Unclear (Low Confidence)"
+                    self._apply_match(album, match, details)
                 else:
                     album.status = "NotFound"
             else:
-                logger.error(f"MusicBrainz API Error: {response.status_code}")
+                logger.error(f"MusicBrainz API Error: {status}")
                 # Don't overwrite error if it's already set to something more specific
-                album.status = f"API Error: {response.status_code}"
+                album.status = f"API Error: {status}"
                 
         except Exception as e:
             logger.error(f"Identification failed: {repr(e)}")
             album.status = f"Error: {str(e)}"
         
+        return album
+
+    @staticmethod
+    def _candidate_rank(release: dict, file_count: int) -> tuple:
+        track_count = int(release.get("track-count", 0))
+        diff = abs(track_count - file_count)
+        has_cover = 0
+        if "cover-art-archive" in release and release["cover-art-archive"].get("front", False):
+            has_cover = 1
+        score_val = int(release.get("score", "0"))
+        return (diff, -has_cover, -score_val)
+
+    def _apply_match(self, album: Album, match: dict, details: Release | None):
+        album.mb_release_id = match.get("id")
+        album.title = match.get("title")
+        if "artist-credit" in match:
+            album.artist = match["artist-credit"][0]["name"]
+
+        if details is not None:
+            self._parse_details_into_album(album, details)
+
+        album.status = "Match"
+
+        # Optimistic: the Cover Art Archive answers 404 for releases without a front cover
+        album.cover_art_url = cover_art_url(album.mb_release_id)
+        if details is not None and details.cover_art_archive:
+            has_front = details.cover_art_archive.front
+        else:
+            has_front = (match.get("cover-art-archive") or {}).get("front", True)
+        self._prefetch_cover(album, has_front)
+
+    @staticmethod
+    def _prefetch_cover(album: Album, has_front: bool):
+        # Tagging prefers a cover next to the files, and releases without front artwork would only 404
+        if album.local_cover_path and album.local_cover_path.exists():
+            return
+        if has_front:
+            get_release_covers().prefetch(album.mb_release_id, album.cover_art_url)
+
+    async def _release_details(self, client: httpx.AsyncClient, mb_release_id: str, lane: str) -> Release | None:
+        """Release lookup with recordings (and so track lengths), from the dump, the cache or the web service."""
+        lookup_params = {
+            "inc": "recordings+artist-credits+labels+isrcs+release-groups+url-rels"
+        }
+        _, details = await self._fetch_release(client, mb_release_id, lookup_params, lane)
+        return details
+
+    async def _pick_by_durations(self, candidates: list[dict], durations: list[float | None],
+                                 client: httpx.AsyncClient, lane: str) -> tuple[dict, Release | None]:
+        """
+        Picks among the best-ranked candidates by how well their track lengths fit the files.
+        The leader's lookup is needed anyway; the runners-up are only fetched when it doesn't fit.
+        Returns the chosen release and its lookup, so identify_album doesn't fetch it again.
+        """
+        tolerance = settings.MUSICBRAINZ_DURATION_TOLERANCE
+        lookups = {candidates[0]["id"]: await self._release_details(client, candidates[0]["id"], lane)}
+        leader = duration_scores(durations, [release_durations(lookups[candidates[0]["id"]])], tolerance)
+        if leader[0] >= DURATION_ACCEPT:
+            return candidates[0], lookups[candidates[0]["id"]]
+
+        contenders = candidates[:settings.MUSICBRAINZ_DURATION_CANDIDATES]
+        for release in contenders[1:]:
+            lookups[release["id"]] = await self._release_details(client, release["id"], lane)
+        best = self._best_fit(durations, [lookups[release["id"]] for release in contenders])
+        return contenders[best], lookups[contenders[best]["id"]]
+
+    @staticmethod
+    def _best_fit(durations: list[float | None], details: list[Release | None]) -> int:
+        """Index of the release whose track lengths fit best; keeps the given order on near-ties."""
+        lengths = [release_durations(release) for release in details]
+        scores = duration_scores(durations, lengths, settings.MUSICBRAINZ_DURATION_TOLERANCE)
+        # 5% steps, so near-equal fits fall back to the existing ranking (track count, cover, search score)
+        return min(range(len(details)), key=lambda i: (-round(scores[i] * 20), i))
+
+    async def _artist_releases(self, client: httpx.AsyncClient, artist: str, lane: str) -> list[dict] | None:
+        """
+        Every release of an artist with recordings, via one artist search and the paged release browse.
+        Returns None when the name doesn't identify exactly one artist or the discography is too large
+        to be worth paging; those albums are searched one by one instead.
+        """
+        params = {"query": f'artist:"{artist}"', "fmt": "json", "limit": 5}
+        _, data = await self._fetch_json(client, "artist", params, lane)
+        exact = [
+            found for found in (data or {}).get("artists", [])
+            if int(found.get("score", 0)) >= 95 and normalize(found.get("name", "")) == normalize(artist)
+        ]
+        if len(exact) != 1:
+            return None
+
+        releases = []
+        for _ in range(settings.MUSICBRAINZ_BROWSE_MAX_PAGES):
+            params = {
+                "artist": exact[0]["id"],
+                "inc": BROWSE_INC,
+                "limit": BROWSE_PAGE_SIZE,
+                "offset": len(releases),
+                "fmt": "json",
+            }
+            status, page = await self._fetch_json(client, "release", params, lane)
+            if page is None:
+                logger.warning(f"Browsing releases of {artist} failed with {status}")
+                return None
+            releases += page.get("releases", [])
+            # Pages can be shorter than the limit when releases have many tracks, so count what arrived
+            if not page.get("releases") or len(releases) >= page.get("release-count", 0):
+                return releases
+        logger.info(f"{artist} has more than {len(releases)} releases; identifying albums individually")
+        return None
+
+    def _match_browsed(self, album: Album, releases: list[dict]) -> bool:
+        """Matches an album against an artist's browsed releases like a search would. True if it matched."""
+        wanted = normalize(album.title)
+        wanted_terms = set(wanted.split())
+        candidates = []
+        for release in releases:
+            if album.year and not (release.get("date") or "").startswith(str(album.year)):
+                continue
+            title = normalize(release.get("title", ""))
+            # Like the search's release:"..." clause, every word of the album title has to be there
+            if not wanted_terms <= set(title.split()):
+                continue
+            score = round(100 * difflib.SequenceMatcher(None, wanted, title).ratio())
+            if score > 80:
+                track_count = sum(medium.get("track-count", 0) for medium in release.get("media") or [])
+                candidates.append({**release, "score": str(score), "track-count": track_count})
+        if not candidates:
+            return False
+
+        file_count = len(album.files)
+        candidates.sort(key=lambda release: self._candidate_rank(release, file_count))
+        match = candidates[0]
+        durations = [file.duration for file in album.files]
+        if settings.MUSICBRAINZ_MATCH_DURATIONS and any(durations) and len(candidates) > 1:
+            # Browsed releases carry their track lengths, so every contender is compared for free
+            contenders = candidates[:settings.MUSICBRAINZ_DURATION_CANDIDATES]
+            match = contenders[self._best_fit(durations, [as_release(release) for release in contenders])]
+        self._apply_match(album, match, as_release(match))
+        return True
+
+    async def iter_identify(self, albums: list[Album]):
+        """
+        Identifies albums concurrently like identify_all(), yielding (index, album) as each one finishes.
+        Closing the generator early cancels the lookups still in flight.
+        """
+        # Artists with several albums to search get their discography browsed once instead
+        searches: dict[str, int] = {}
+        for album in albums:
+            if not (album.duplicate_of or album.mb_release_id) and album.artist != "Unknown Artist" and album.title:
+                searches[normalize(album.artist)] = searches.get(normalize(album.artist), 0) + 1
+        browses: dict[str, asyncio.Future] = {}
+        if not self.offline:
+            for album in albums:
+                key = normalize(album.artist)
+                if key and key not in browses and searches.get(key, 0) >= settings.MUSICBRAINZ_BROWSE_MIN_ALBUMS:
+                    browses[key] = asyncio.ensure_future(self._artist_releases(get_http_client(), album.artist, BULK))
+
+        async def identify_one(index: int, album: Album) -> tuple[int, Album]:
+            # Copies of another scanned album are handled with their original; no MusicBrainz traffic
+            if album.duplicate_of:
+                return index, album
+            # Fast Path: If album already has an ID (from tags or manual fix), resolve directly
+            if album.mb_release_id:
+                return index, await self.resolve_release(album, album.mb_release_id, BULK)
+            browse = browses.get(normalize(album.artist))
+            if browse is not None:
+                try:
+                    releases = await browse
+                except Exception as e:
+                    logger.warning(f"Browsing releases of {album.artist} failed: {repr(e)}")
+                    releases = None
+                if releases and self._match_browsed(album, releases):
+                    return index, album
+            return index, await self.identify_album(album)
+
+        tasks = [asyncio.ensure_future(identify_one(index, album)) for index, album in enumerate(albums)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
         finally:
-            if should_close and active_client:
-                await active_client.aclose()
+            for task in tasks + list(browses.values()):
+                task.cancel()
 
-        # Rate limiting compliance
-        await asyncio.sleep(1.1) 
-        
-        return album
+    async def iter_identify_progress(self, albums: list[Album]):
+        """
+        Streaming variant of identify_all(): yields (index, album, progress) as each album is resolved.
+        progress counts outcomes so far, the MusicBrainz requests still queued and an ETA in seconds
+        extrapolated from the pace of the batch (None until the first album is done).
+        """
+        started = time.monotonic()
+        progress = {"done": 0, "total": len(albums), "matched": 0, "not_found": 0, "failed": 0,
+                    "queued": 0, "eta_seconds": None}
+        async for index, album in self.iter_identify(albums):
+            progress["done"] += 1
+            if album.status == "Match":
+                progress["matched"] += 1
+            elif album.status == "NotFound":
+                progress["not_found"] += 1
+            elif "Error" in (album.status or ""):
+                progress["failed"] += 1
+            progress["queued"] = sum(self.scheduler.pending().values())
+            remaining = progress["total"] - progress["done"]
+            progress["eta_seconds"] = round((time.monotonic() - started) / progress["done"] * remaining, 1)
+            yield index, album, dict(progress)
 
     async def identify_all(self, albums: list[Album]) -> list[Album]:
-        async with httpx.AsyncClient(verify=False, timeout=10.0) as client:
-            tasks = []
-            for album in albums:
-                # Fast Path: If album already has an ID (from tags or manual fix), resolve directly
-                if album.mb_release_id:
-                     tasks.append(self.resolve_release(album, album.mb_release_id))
-                else:
-                     tasks.append(self.identify_album(album, client))
-            
-            return await asyncio.gather(*tasks)
+        results = list(albums)
+        async for index, album in self.iter_identify(albums):
+            results[index] = album
+        return results
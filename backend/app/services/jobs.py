@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+from app.core.settings import settings
+from app.domain.models import Album, JobInfo
+from app.services.identification import IdentificationService
+from app.services.organization import OrganizationService
+from app.services.scan_results import get_scan_results
+from app.services.scanning import ScanService
+from app.services.tagging import TaggingService
+
+logger = logging.getLogger(__name__)
+
+# Progress events a slow subscriber may lag behind by; older ones are dropped first
+JOB_EVENT_QUEUE_SIZE = 256
+
+FINISHED_STATUSES = {"completed", "failed", "cancelled"}
+
+class Job:
+    """
+    One long-running operation. Runners report per-item progress through advance();
+    subscribers get {"event": "item", ...} per item and {"event": "status", "job": {...}} on state changes.
+    """
+
+    def __init__(self, kind: str, total: int = 0):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.done = 0
+        self.total = total
+        self.results: dict[int, object] = {}
+        self.summary: dict | None = None
+        self.error: str | None = None
+        self.created_at = datetime.now(UTC)
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.task: asyncio.Task | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def info(self) -> JobInfo:
+        return JobInfo(
+            id=self.id,
+            kind=self.kind,
+            status=self.status,
+            done=self.done,
+            total=self.total,
+            summary=self.summary,
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+    def advance(self, index: int | None = None, result=None):
+        """Records one finished item. A JSON-ready result is kept under its index for /results."""
+        self.done += 1
+        self.total = max(self.total, self.done)
+        if index is not None:
+            self.results[index] = result
+        self.publish({"event": "item", "index": index, "done": self.done, "total": self.total, "result": result})
+
+    def set_status(self, status: str, error: str | None = None):
+        self.status = status
+        self.error = error
+        now = datetime.now(UTC)
+        if status == "running":
+            self.started_at = now
+        elif status in FINISHED_STATUSES:
+            self.finished_at = now
+        self.publish({"event": "status", "job": self.info().model_dump(mode="json")})
+        if self.finished:
+            # Ends every subscriber's stream
+            self.publish(None)
+
+    @contextmanager
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=JOB_EVENT_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def publish(self, event: dict | None):
+        for queue in self._subscribers:
+            if queue.full():
+                # Progress is cumulative, so losing an old item event is harmless
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+class JobManager:
+    """
+    Runs jobs as tasks inside the app, at most JOB_WORKERS at a time, so long operations outlive
+    the request that submitted them. Keeps the last JOB_HISTORY finished jobs for polling.
+    """
+
+    def __init__(self, max_workers: int | None = None, history: int | None = None):
+        self._slots = asyncio.Semaphore(max_workers or settings.JOB_WORKERS)
+        self.history = history or settings.JOB_HISTORY
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def submit(self, kind: str, runner, total: int = 0) -> Job:
+        """Queues runner(job), a coroutine function returning the job summary."""
+        job = Job(kind, total)
+        self._jobs[job.id] = job
+        self._trim()
+        job.task = asyncio.create_task(self._execute(job, runner), name=f"job-{kind}-{job.id}")
+        job.task.add_done_callback(lambda _: self._on_done(job))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Job | None:
+        job = self._jobs.get(job_id)
+        if job and not job.finished and job.task:
+            job.task.cancel()
+        return job
+
+    async def shutdown(self):
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.finished]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _execute(self, job: Job, runner):
+        try:
+            async with self._slots:
+                job.set_status("running")
+                job.summary = await runner(job)
+            job.set_status("completed")
+        except asyncio.CancelledError:
+            logger.info(f"Job {job.id} ({job.kind}) cancelled after {job.done}/{job.total} items")
+            job.set_status("cancelled")
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {repr(e)}")
+            job.set_status("failed", error=str(e))
+
+    def _on_done(self, job: Job):
+        # A job cancelled before its task ever ran never reaches _execute's handlers
+        if not job.finished:
+            job.set_status("cancelled")
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+_manager: JobManager | None = None
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager()
+    return _manager
+
+# Runners for the built-in job kinds. Each mirrors its synchronous endpoint but reports per-item progress.
+
+def scan_runner(input_path: Path):
+    async def run(job: Job) -> dict:
+        albums = {}
+        async for _, album, progress in ScanService().iter_scan(input_path):
+            job.total = progress['directories_found']
+            # Albums flagged as duplicates after the walk come through a second time
+            if album is not None and album.path not in albums:
+                albums[album.path] = album
+                job.advance()
+        # Results are paged through /scan/page rather than kept on the job
+        get_scan_results().put_albums(input_path, list(albums.values()))
+        return {"albums": len(albums)}
+    return run
+
+def identify_runner(albums: list[Album]):
+    async def run(job: Job) -> dict:
+        matched = 0
+        async for index, album in IdentificationService().iter_identify(albums):
+            matched += album.status == "Match"
+            job.advance(index, album.model_dump(mode="json"))
+        return {"attempted": len(albums), "matched": matched}
+    return run
+
+def tag_runner(albums: list[Album]):
+    async def run(job: Job) -> dict:
+        service = TaggingService()
+        tagged = 0
+        for index, album in enumerate(albums):
+            # Only tag matches to prevent destroying data with "Unknown"
+            if album.status == "Match":
+                await service.tag_album(album)
+                tagged += 1
+            job.advance(index, album.model_dump(mode="json"))
+        return {"attempted": len(albums), "tagged": tagged}
+    return run
+
+def organize_runner(albums: list[Album], output_path: str):
+    async def run(job: Job) -> dict:
+        service = OrganizationService(output_path)
+        moved = 0
+        for index, album in enumerate(albums):
+            ok = album.status == "Match" and await service.organize_album(album)
+            moved += ok
+            job.advance(index, {"path": str(album.path), "moved": ok})
+        return {"attempted": len(albums), "moved": moved}
+    return run
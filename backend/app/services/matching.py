@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.services.musicbrainz_schema import Release
+
+# Order-free matches (misnumbered files) count a little less than tracks that line up by position
+ORDER_FREE_WEIGHT = 0.9
+
+def release_durations(release: Release | None) -> list[float | None]:
+    """Track lengths in seconds of a release lookup (inc=recordings), in disc and track order."""
+    lengths = []
+    for medium in release.media if release else []:
+        for track in medium.tracks:
+            length = track.length or (track.recording.length if track.recording else None)
+            lengths.append(length / 1000 if length else None)
+    return lengths
+
+def _order_free_matches(target: np.ndarray, lengths: np.ndarray, tolerance: float) -> int:
+    # Both sorted: pairing greedily from the shortest tracks up finds the most one-to-one matches
+    matched = i = j = 0
+    while i < len(target) and j < len(lengths):
+        if abs(target[i] - lengths[j]) <= tolerance:
+            matched += 1
+            i += 1
+            j += 1
+        elif target[i] < lengths[j]:
+            i += 1
+        else:
+            j += 1
+    return matched
+
+def duration_scores(album: list[float | None], candidates: list[list[float | None]], tolerance: float) -> np.ndarray:
+    """
+    Scores each candidate's track lengths against the album's, 0 to 1: the share of tracks paired
+    one-to-one with a track within `tolerance` seconds. Tracks are paired by position, and also
+    order-free (slightly discounted) so badly numbered files still find their release. Candidate
+    tracks beyond the album's own count are misses, so a short release can't fit a long album or vice versa.
+    """
+    target = np.array([np.nan if d is None else d for d in album], dtype=float)
+    known = ~np.isnan(target)
+    if not candidates or not known.any():
+        return np.zeros(len(candidates))
+
+    width = max(len(target), max(len(lengths) for lengths in candidates))
+    matrix = np.full((len(candidates), width), np.nan)
+    for row, lengths in enumerate(candidates):
+        matrix[row, :len(lengths)] = [np.nan if length is None else length for length in lengths]
+    counts = np.array([len(lengths) for lengths in candidates])
+    slots = known.sum() + np.maximum(0, counts - len(target))
+
+    # NaN never compares within tolerance, so unknown lengths and missing tracks simply don't match
+    positional = (np.abs(matrix[:, :len(target)][:, known] - target[known]) <= tolerance).sum(axis=1)
+    wanted = np.sort(target[known])
+    order_free = np.array([_order_free_matches(wanted, np.sort(row[~np.isnan(row)]), tolerance) for row in matrix])
+    return np.maximum(positional, ORDER_FREE_WEIGHT * order_free) / slots
@@ -0,0 +1,166 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# Request parameters that don't change the response body
+IGNORED_PARAMS = {'fmt'}
+
+def request_key(path: str, params: dict) -> str:
+    """
+    Normalizes a MusicBrainz request into a cache key: parameters are sorted, search queries are
+    case-folded with collapsed whitespace, and inc sets are sorted so 'a+b' and 'b+a' share an entry.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if name in IGNORED_PARAMS or value is None:
+            continue
+        value = str(value)
+        if name == 'query':
+            value = ' '.join(value.casefold().split())
+        elif name == 'inc':
+            value = '+'.join(sorted(set(filter(None, value.split('+')))))
+        normalized[name] = value
+    return f"{path.strip('/')}?{urlencode(sorted(normalized.items()))}"
+
+class MusicBrainzCache:
+    """
+    Persistent cache of MusicBrainz JSON responses. Searches and release lookups get separate TTLs,
+    and the least recently used entries are evicted once the cache grows past MUSICBRAINZ_CACHE_MB.
+    Only successful responses are stored, so errors are retried on the next run.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int | None = None, search_ttl: float | None = None,
+                 lookup_ttl: float | None = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.MUSICBRAINZ_CACHE_MB * 1024 * 1024
+        self.search_ttl = search_ttl if search_ttl is not None else settings.MUSICBRAINZ_CACHE_SEARCH_TTL_HOURS * 3600
+        self.lookup_ttl = lookup_ttl if lookup_ttl is not None else settings.MUSICBRAINZ_CACHE_LOOKUP_TTL_HOURS * 3600
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _migrate(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version and version != SCHEMA_VERSION:
+                logger.info(f"Rebuilding MusicBrainz cache {self.db_path} (schema {version} -> {SCHEMA_VERSION})")
+                self._conn.execute("DROP TABLE IF EXISTS responses")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def get(self, path: str, params: dict) -> dict | None:
+        """Returns the cached response for a request, or None if it's missing or expired."""
+        body = self.get_raw(path, params)
+        return None if body is None else json.loads(body)
+
+    def get_raw(self, path: str, params: dict) -> str | bytes | None:
+        """Like get(), but returns the stored JSON undecoded, for callers with their own decoder."""
+        key = request_key(path, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, path: str, params: dict, data: dict):
+        self.put_raw(path, params, json.dumps(data, separators=(',', ':')))
+
+    def put_raw(self, path: str, params: dict, body: str | bytes):
+        key = request_key(path, params)
+        ttl = self.search_ttl if 'query' in params else self.lookup_ttl
+        now = time.time()
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now + ttl, now),
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        # Expired entries go first, then the least recently used until we're back at 90% of the budget
+        expired = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        target = self.max_bytes * 0.9
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= target:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evictions += expired + len(stale)
+        self._total_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_cache: MusicBrainzCache | None = None
+_cache_lock = threading.Lock()
+
+def get_musicbrainz_cache() -> MusicBrainzCache | None:
+    """Returns the process-wide MusicBrainz cache, or None when it is disabled or unavailable."""
+    global _cache
+    if not settings.MUSICBRAINZ_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = MusicBrainzCache(settings.CACHE_DIR / "musicbrainz.sqlite3")
+            except Exception as e:
+                logger.warning(f"MusicBrainz cache unavailable, every lookup goes to the API: {e}")
+                return None
+        return _cache
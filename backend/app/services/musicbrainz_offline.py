@@ -0,0 +1,270 @@
+"""
+Local MusicBrainz release index for identifying large libraries without the 1 req/s API limit.
+
+Build it from the `release` entity of the MusicBrainz JSON dumps
+(https://data.metabrainz.org/pub/musicbrainz/data/json-dumps/):
+
+    python -m app.services.musicbrainz_offline /path/to/release.tar.xz
+
+and set MUSICBRAINZ_BACKEND=offline.
+"""
+import argparse
+import difflib
+import gzip
+import json
+import logging
+import lzma
+import os
+import re
+import sqlite3
+import sys
+import tarfile
+import threading
+import time
+import unicodedata
+import zlib
+from pathlib import Path
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+IMPORT_BATCH = 5000
+
+# FTS candidates scored per search; plenty for a ranked top 10
+CANDIDATES = 50
+
+# Searches match on this many of the rarest query terms; scoring compares the full strings afterwards.
+# Requiring every term would make FTS intersect the huge doclists of words like "the" or "live".
+SEARCH_TERMS = 2
+
+# Release fields _parse_details_into_album and the search results use; the rest of a dump entry is dropped
+RELEASE_FIELDS = (
+    'id', 'title', 'status', 'date', 'country', 'barcode', 'asin', 'text-representation', 'label-info',
+    'release-group', 'artist-credit', 'tags', 'genres', 'media', 'cover-art-archive',
+)
+TRACK_FIELDS = ('id', 'title', 'position', 'number', 'length', 'artist-credit')
+
+def normalize(value: str) -> str:
+    value = value.casefold()
+    if not value.isascii():
+        # Drop accents like the FTS tokenizer (remove_diacritics) does, so "björk" looks up the indexed "bjork"
+        value = ''.join(c for c in unicodedata.normalize('NFKD', value) if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', value))
+
+def credit_name(credits: list[dict]) -> str:
+    return ''.join(f"{credit.get('name', '')}{credit.get('joinphrase', '')}" for credit in credits or [])
+
+def _compact(release: dict) -> dict:
+    compact = {key: release[key] for key in RELEASE_FIELDS if key in release}
+    media = []
+    for medium in release.get('media') or []:
+        medium = {key: value for key, value in medium.items() if key not in ('discs', 'data-tracks', 'pregap')}
+        tracks = []
+        for track in medium.get('tracks') or []:
+            slim = {key: track[key] for key in TRACK_FIELDS if key in track}
+            if 'recording' in track:
+                slim['recording'] = {'id': track['recording'].get('id')}
+            tracks.append(slim)
+        medium['tracks'] = tracks
+        media.append(medium)
+    compact['media'] = media
+    return compact
+
+def _open_dump(path: Path):
+    """Yields the JSON lines of a release dump: the mbdump/release member of a tarball, or a (compressed) file."""
+    name = path.name
+    if '.tar' in name:
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith('mbdump/release'):
+                    yield from archive.extractfile(member)
+                    return
+        raise ValueError(f"{path} has no mbdump/release member")
+    opener = lzma.open if name.endswith('.xz') else gzip.open if name.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        yield from f
+
+class MusicBrainzOfflineIndex:
+    """
+    Read side of the imported dump. Searches run against an FTS5 index of release titles and
+    artist credits and are scored like the web service (0-100), so identify_album's thresholds
+    and candidate ranking apply unchanged. Lookups take well under a millisecond, so callers run them
+    inline on the event loop; one read-only connection serves them all.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        if not self.db_path.is_file():
+            raise FileNotFoundError(f"No offline MusicBrainz index at {self.db_path}")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"{self.db_path} has schema {version}, expected {SCHEMA_VERSION}; re-import the dump")
+
+    def search(self, artist: str, release: str, year: int | None = None, limit: int = 10) -> dict:
+        """Returns {"releases": [...]} shaped like a web service release search."""
+        wanted_title, wanted_artist = normalize(release), normalize(artist)
+        tokens = set(wanted_title.split()) | set(wanted_artist.split())
+        if not wanted_title or not tokens:
+            return {"releases": []}
+        with self._lock:
+            frequencies = self._conn.execute(
+                f"SELECT term, docs FROM terms WHERE term IN ({', '.join('?' for _ in tokens)}) ORDER BY docs",
+                tuple(tokens),
+            ).fetchall()
+            if not frequencies:
+                return {"releases": []}
+            # Quote every term so FTS syntax characters in titles can't break the query
+            match = ' '.join(f'"{term}"' for term, _ in frequencies[:SEARCH_TERMS])
+            rows = self._conn.execute(
+                """
+                SELECT r.id, r.title, r.artist, r.date, r.track_count, r.has_front, r.credits
+                FROM release_search JOIN releases r ON r.rowid = release_search.rowid
+                WHERE release_search MATCH ? AND (? IS NULL OR r.year = ?)
+                ORDER BY rank LIMIT ?
+                """,
+                (match, year, year, CANDIDATES),
+            ).fetchall()
+
+        releases = []
+        for mbid, title, credited, date, track_count, has_front, credits in rows:
+            title_score = difflib.SequenceMatcher(None, wanted_title, normalize(title)).ratio()
+            artist_score = difflib.SequenceMatcher(None, wanted_artist, normalize(credited)).ratio()
+            releases.append({
+                "id": mbid,
+                "score": str(round(100 * (title_score + artist_score) / 2)),
+                "title": title,
+                "date": date,
+                "track-count": track_count,
+                "artist-credit": json.loads(credits),
+                "cover-art-archive": {"front": bool(has_front)},
+            })
+        releases.sort(key=lambda r: -int(r["score"]))
+        return {"releases": releases[:limit]}
+
+    def release(self, mbid: str) -> dict | None:
+        """Returns the stored release in web service lookup shape, or None if it isn't in the dump."""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM releases WHERE id = ?", (mbid,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+def import_dump(dump: Path, db_path: Path) -> int:
+    """
+    Builds a fresh index from a release dump and swaps it in atomically. Returns the number of releases.
+    Readers keep using the previous index until the import has finished.
+    """
+    tmp_path = db_path.with_name(db_path.name + '.importing')
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(tmp_path))
+    # A half-written import is thrown away anyway, so skip durability until the swap
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        """
+        CREATE TABLE releases (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            artist TEXT NOT NULL,
+            date TEXT,
+            year INTEGER,
+            track_count INTEGER NOT NULL,
+            has_front INTEGER NOT NULL,
+            credits TEXT NOT NULL,
+            body BLOB NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX releases_year ON releases(year)")
+    conn.execute(
+        "CREATE VIRTUAL TABLE release_search USING fts5("
+        "title, artist, content='releases', tokenize='unicode61 remove_diacritics 2')"
+    )
+
+    count = 0
+    batch = []
+    started = time.monotonic()
+
+    def flush():
+        conn.executemany("INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        batch.clear()
+
+    try:
+        for line in _open_dump(dump):
+            if not line.strip():
+                continue
+            release = json.loads(line)
+            if not release.get('id') or not release.get('title'):
+                continue
+            compact = _compact(release)
+            date = release.get('date') or ''
+            credits = [
+                {key: credit[key] for key in ('name', 'joinphrase', 'artist') if key in credit}
+                for credit in release.get('artist-credit') or []
+            ]
+            batch.append((
+                release['id'],
+                release['title'],
+                credit_name(credits),
+                date,
+                int(date[:4]) if date[:4].isdigit() else None,
+                sum(medium.get('track-count') or len(medium.get('tracks') or []) for medium in compact['media']),
+                int(bool((release.get('cover-art-archive') or {}).get('front'))),
+                json.dumps(credits, separators=(',', ':')),
+                zlib.compress(json.dumps(compact, separators=(',', ':')).encode()),
+            ))
+            count += 1
+            if len(batch) >= IMPORT_BATCH:
+                flush()
+                if count % (IMPORT_BATCH * 20) == 0:
+                    logger.info(f"Imported {count} releases ({count / (time.monotonic() - started):.0f}/s)")
+        flush()
+        conn.execute("INSERT INTO release_search(release_search) VALUES ('rebuild')")
+        conn.execute("INSERT INTO release_search(release_search) VALUES ('optimize')")
+        # Document frequencies let searches start from their most selective terms
+        conn.execute("CREATE VIRTUAL TABLE temp.release_terms USING fts5vocab(main, release_search, row)")
+        conn.execute("CREATE TABLE terms (term TEXT PRIMARY KEY, docs INTEGER NOT NULL) WITHOUT ROWID")
+        conn.execute("INSERT INTO terms SELECT term, doc FROM temp.release_terms")
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+    logger.info(f"Imported {count} releases into {db_path} in {time.monotonic() - started:.0f}s")
+    return count
+
+_index: MusicBrainzOfflineIndex | None = None
+_index_lock = threading.Lock()
+
+def offline_db_path() -> Path:
+    return settings.MUSICBRAINZ_OFFLINE_DB or settings.CACHE_DIR / "musicbrainz_offline.sqlite3"
+
+def get_offline_index() -> MusicBrainzOfflineIndex | None:
+    """Returns the imported index when MUSICBRAINZ_BACKEND is offline, or None to use the web service."""
+    global _index
+    if settings.MUSICBRAINZ_BACKEND != "offline":
+        return None
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = MusicBrainzOfflineIndex(offline_db_path())
+            except Exception as e:
+                logger.warning(f"Offline MusicBrainz index unavailable, using the web service: {e}")
+                return None
+        return _index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a MusicBrainz JSON release dump for offline identification")
+    parser.add_argument("dump", type=Path, help="release.tar.xz from the JSON dumps, or its mbdump/release file")
+    parser.add_argument("--db", type=Path, default=None, help="Index to write (default: MUSICBRAINZ_OFFLINE_DB)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    total = import_dump(args.dump, args.db or offline_db_path())
+    print(f"Imported {total} releases", file=sys.stderr)
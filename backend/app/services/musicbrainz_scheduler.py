@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Manual lookups from the UI; served before anything in the bulk lane
+INTERACTIVE = "interactive"
+# Batch identification
+BULK = "bulk"
+
+LANES = (INTERACTIVE, BULK)
+
+class MusicBrainzScheduler:
+    """
+    Process-wide gate for MusicBrainz requests. A token bucket refilled at MUSICBRAINZ_RATE_LIMIT
+    requests per second hands out permits one at a time, interactive waiters first. Each lane admits
+    at most MUSICBRAINZ_QUEUE_SIZE waiters; further callers wait for room before they queue.
+    """
+
+    def __init__(self, rate: float | None = None, burst: int | None = None, queue_size: int | None = None):
+        self.rate = rate or settings.MUSICBRAINZ_RATE_LIMIT
+        self.burst = burst or settings.MUSICBRAINZ_BURST
+        self.queue_size = queue_size or settings.MUSICBRAINZ_QUEUE_SIZE
+        self.granted = {lane: 0 for lane in LANES}
+        self._resume_at = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind(self):
+        # Queues and the dispatcher belong to one event loop; start fresh if we're used from another
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters = {lane: deque() for lane in LANES}
+        self._room = {lane: asyncio.Semaphore(self.queue_size) for lane in LANES}
+        self._wakeup = asyncio.Event()
+        self._dispatcher = loop.create_task(self._dispatch(), name="musicbrainz-scheduler")
+
+    async def acquire(self, lane: str = BULK):
+        """Waits for permission to send one request."""
+        self._bind()
+        async with self._room[lane]:
+            permit = self._loop.create_future()
+            self._waiters[lane].append(permit)
+            self._wakeup.set()
+            await permit
+        self.granted[lane] += 1
+
+    def defer(self, seconds: float):
+        """Holds back every lane for a while, e.g. when MusicBrainz answered with Retry-After."""
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def pending(self) -> dict[str, int]:
+        if self._loop is None:
+            return {lane: 0 for lane in LANES}
+        return {lane: sum(not permit.done() for permit in self._waiters[lane]) for lane in LANES}
+
+    def _next_waiter(self) -> asyncio.Future | None:
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            # Drop callers that gave up (cancelled) while queued
+            while waiters and waiters[0].done():
+                waiters.popleft()
+            if waiters:
+                return waiters[0]
+        return None
+
+    async def _dispatch(self):
+        while True:
+            if self._next_waiter() is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            if now < self._resume_at:
+                await asyncio.sleep(self._resume_at - now)
+                continue
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                # Pick again: an interactive request may have arrived while we slept
+                continue
+
+            permit = self._next_waiter()
+            if permit is not None:
+                self._tokens -= 1
+                permit.set_result(None)
+                # Let the woken caller run before the next permit is considered
+                await asyncio.sleep(0)
+
+_scheduler: MusicBrainzScheduler | None = None
+
+def get_musicbrainz_scheduler() -> MusicBrainzScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = MusicBrainzScheduler()
+    return _scheduler
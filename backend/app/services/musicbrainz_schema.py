@@ -0,0 +1,90 @@
+"""
+Typed views of MusicBrainz release lookups. Only the fields identification and tagging read are
+declared, so decoding skips everything else (ISRCs, URL relations, recording details) without
+building dicts for it; box set lookups run to megabytes, almost all of it unused.
+"""
+import msgspec
+
+
+class _Struct(msgspec.Struct, rename="kebab", omit_defaults=True, gc=False):
+    pass
+
+class Artist(_Struct):
+    id: str = ""
+    name: str = ""
+    sort_name: str = ""
+
+class ArtistCredit(_Struct):
+    name: str = ""
+    joinphrase: str = ""
+    artist: Artist | None = None
+
+class Label(_Struct):
+    name: str | None = None
+
+class LabelInfo(_Struct):
+    catalog_number: str | None = None
+    label: Label | None = None
+
+class ReleaseGroup(_Struct):
+    id: str = ""
+    primary_type: str | None = None
+    first_release_date: str | None = None
+
+class TextRepresentation(_Struct):
+    script: str | None = None
+
+class Tag(_Struct):
+    name: str = ""
+
+class Recording(_Struct):
+    id: str = ""
+    length: int | None = None
+
+class Track(_Struct):
+    id: str = ""
+    title: str = ""
+    length: int | None = None
+    artist_credit: list[ArtistCredit] = []
+    recording: Recording | None = None
+
+class Medium(_Struct):
+    format: str | None = None
+    position: int | None = None
+    track_count: int | None = None
+    tracks: list[Track] = []
+
+class CoverArtArchive(_Struct):
+    front: bool = True
+
+class Release(_Struct):
+    id: str = ""
+    title: str = ""
+    status: str | None = None
+    date: str | None = None
+    country: str | None = None
+    barcode: str | None = None
+    asin: str | None = None
+    text_representation: TextRepresentation | None = None
+    label_info: list[LabelInfo] = []
+    release_group: ReleaseGroup | None = None
+    artist_credit: list[ArtistCredit] = []
+    tags: list[Tag] = []
+    genres: list[Tag] = []
+    media: list[Medium] = []
+    cover_art_archive: CoverArtArchive | None = None
+
+_decoder = msgspec.json.Decoder(Release)
+_encoder = msgspec.json.Encoder()
+
+def decode_release(raw: bytes | str) -> Release:
+    """Decodes a release lookup (or a cached encode_release() body). Raises msgspec.DecodeError on bad input."""
+    return _decoder.decode(raw)
+
+def encode_release(release: Release) -> bytes:
+    """Compact JSON of the declared fields only; what the response cache keeps for lookups."""
+    return _encoder.encode(release)
+
+def as_release(details: dict) -> Release:
+    """Converts an already parsed lookup, e.g. a browsed release or one from the offline dump."""
+    return msgspec.convert(details, Release)
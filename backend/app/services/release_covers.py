@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+
+from app.core.settings import settings
+from app.services.covers import CoverStore
+from app.services.http_client import CircuitOpenError, get_circuit_breaker, get_http_client
+
+logger = logging.getLogger(__name__)
+
+MBID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+def cover_art_url(mbid: str) -> str:
+    return f"{settings.COVER_ART_BASE_URL.rstrip('/')}/release/{mbid}/front"
+
+class ReleaseCoverCache:
+    """
+    Front covers from the Cover Art Archive, downloaded while albums are identified so tagging
+    can read them from disk. Images are stored content-addressed (releases sharing artwork share
+    a file) with a small pointer per release MBID, and the least recently used images are evicted
+    once the cache grows past COVER_CACHE_MB.
+    """
+
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None, concurrency: int | None = None):
+        self.root = Path(root or settings.CACHE_DIR / "release-covers")
+        self.max_bytes = max_bytes if max_bytes is not None else settings.COVER_CACHE_MB * 1024 * 1024
+        self.store = CoverStore(self.root / "images", max_bytes=self.max_bytes)
+        self.concurrency = concurrency or settings.COVER_PREFETCH_CONCURRENCY
+        self.breaker = get_circuit_breaker(
+            "Cover Art Archive", settings.COVER_ART_BREAKER_FAILURES, settings.COVER_ART_BREAKER_RESET_SECONDS
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._fetches: dict[str, asyncio.Task] = {}
+
+    def _pointer(self, mbid: str) -> Path:
+        return self.root / "releases" / mbid[:2] / mbid
+
+    def cover_name(self, mbid: str) -> str | None:
+        """Returns the cached cover name of a release, or None if it hasn't been downloaded (or was evicted)."""
+        if not MBID.match(mbid or ''):
+            return None
+        try:
+            name = self._pointer(mbid).read_text().strip()
+        except OSError:
+            return None
+        return name if self.store.path_for(name) else None
+
+    def get(self, mbid: str) -> bytes | None:
+        # cover_name() looks the image up through the store, which touches it for LRU ordering
+        name = self.cover_name(mbid)
+        if name is None:
+            return None
+        try:
+            return (self.store.root / name[:2] / name).read_bytes()
+        except OSError:
+            return None
+
+    def prefetch(self, mbid: str, url: str | None = None):
+        """Starts downloading a release's front cover in the background unless it is cached or on its way."""
+        if not settings.COVER_PREFETCH_ENABLED or not MBID.match(mbid or '') or self.cover_name(mbid):
+            return
+        self._start(mbid, url)
+
+    async def fetch(self, mbid: str, url: str | None = None) -> bytes | None:
+        """Returns the cover from disk, joining or starting its download on a miss."""
+        data = self.get(mbid)
+        if data is not None or not MBID.match(mbid or ''):
+            return data
+        await asyncio.shield(self._start(mbid, url))
+        return self.get(mbid)
+
+    async def wait(self):
+        """Waits for the downloads currently in flight."""
+        if self._fetches:
+            await asyncio.gather(*self._fetches.values(), return_exceptions=True)
+
+    def _start(self, mbid: str, url: str | None) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Tasks and the semaphore belong to one event loop
+            self._loop = loop
+            self._fetches = {}
+            self._slots = asyncio.Semaphore(self.concurrency)
+        task = self._fetches.get(mbid)
+        if task is None:
+            task = loop.create_task(self._download(mbid, url or cover_art_url(mbid)))
+            self._fetches[mbid] = task
+            task.add_done_callback(lambda _: self._fetches.pop(mbid, None))
+        return task
+
+    async def _download(self, mbid: str, url: str):
+        async with self._slots:
+            try:
+                self.breaker.check()
+                response = await get_http_client().get(url, timeout=settings.HTTP_TIMEOUT)
+            except CircuitOpenError:
+                return
+            except Exception as e:
+                self.breaker.record_failure()
+                logger.warning(f"Could not download cover of release {mbid}: {repr(e)}")
+                return
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            logger.warning(f"Cover Art Archive answered {response.status_code} for release {mbid}")
+            return
+        self.breaker.record_success()
+        if response.status_code != 200:
+            # Most often 404: the release simply has no front cover
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._save, mbid, response.headers.get("content-type", ""), response.content
+            )
+        except OSError as e:
+            logger.warning(f"Could not cache cover of release {mbid}: {e}")
+
+    def _save(self, mbid: str, mime: str, data: bytes):
+        # The store evicts its least recently used images; their pointers go stale
+        name = self.store.add_data(mime, data)
+        # Artwork shared with an earlier release counts as used again
+        os.utime(self.store.path_for(name))
+        pointer = self._pointer(mbid)
+        pointer.parent.mkdir(parents=True, exist_ok=True)
+        pointer.write_text(name)
+
+_cache: ReleaseCoverCache | None = None
+
+def get_release_covers() -> ReleaseCoverCache:
+    global _cache
+    if _cache is None:
+        _cache = ReleaseCoverCache()
+    return _cache
@@ -0,0 +1,332 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored columns change; the index is a cache and is rebuilt from scratch.
+SCHEMA_VERSION = 5
+
+FILE_COLUMNS = (
+    'title', 'artist', 'album', 'date', 'year',
+    'mb_album_id', 'mb_artist_id', 'mb_recording_id',
+    'has_picture', 'duration',
+)
+
+# Filled in by duplicate detection; cleared whenever a file is re-read
+CONTENT_COLUMNS = ('payload_start', 'payload_end', 'quick_hash', 'full_hash')
+
+class ScanIndex:
+    """
+    On-disk catalog of tags extracted during scans.
+    Rows are keyed by file path and only trusted while size and mtime_ns still match,
+    so a rescan only has to open new or changed files.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+    def _migrate(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version and version != SCHEMA_VERSION:
+                logger.info(f"Rebuilding scan index {self.db_path} (schema {version} -> {SCHEMA_VERSION})")
+                self._conn.execute("DROP TABLE IF EXISTS files")
+                self._conn.execute("DROP TABLE IF EXISTS directories")
+                self._conn.execute("DROP TABLE IF EXISTS covers")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    dir TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    title TEXT,
+                    artist TEXT,
+                    album TEXT,
+                    date TEXT,
+                    year INTEGER,
+                    mb_album_id TEXT,
+                    mb_artist_id TEXT,
+                    mb_recording_id TEXT,
+                    has_picture INTEGER NOT NULL DEFAULT 0,
+                    duration REAL,
+                    payload_start INTEGER,
+                    payload_end INTEGER,
+                    quick_hash TEXT,
+                    full_hash TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS files_dir ON files(dir)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS directories (
+                    path TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS covers (
+                    source TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    local INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS covers_name ON covers(name)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS health (
+                    path TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    name_key TEXT NOT NULL,
+                    missing_cover INTEGER NOT NULL,
+                    missing_mbid INTEGER NOT NULL,
+                    track_count INTEGER NOT NULL,
+                    found_mbid TEXT,
+                    cover_name TEXT,
+                    has_thumbnails INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # Roots whose whole tree went through a health crawl; rows of sub-folder scans don't count
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS health_roots (
+                    path TEXT PRIMARY KEY,
+                    crawled_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def lookup_directory(self, directory: str) -> tuple[str | None, dict[str, dict]]:
+        """Returns the stored crawler fingerprint and all indexed files of one directory, keyed by path."""
+        with self._lock:
+            row = self._conn.execute("SELECT fingerprint FROM directories WHERE path = ?", (directory,)).fetchone()
+            rows = self._conn.execute("SELECT * FROM files WHERE dir = ?", (directory,)).fetchall()
+        return (row['fingerprint'] if row else None), {row['path']: dict(row) for row in rows}
+
+    def update_directory(self, directory: str, records: list[dict], keep_paths: set[str],
+                         fingerprint: str | None = None):
+        """
+        Upserts freshly extracted records and drops rows for files that
+        no longer exist in the directory. Pass the crawler fingerprint only
+        once every file of the listing is indexed.
+        """
+        columns = ('path', 'dir', 'size', 'mtime_ns') + FILE_COLUMNS
+        placeholders = ', '.join('?' for _ in columns)
+        with self._lock, self._conn:
+            if records:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO files ({', '.join(columns)}) VALUES ({placeholders})",
+                    [tuple(record.get(c) for c in columns) for record in records],
+                )
+            stale = [
+                (row['path'],)
+                for row in self._conn.execute("SELECT path FROM files WHERE dir = ?", (directory,))
+                if row['path'] not in keep_paths
+            ]
+            if stale:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", stale)
+            if fingerprint:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO directories (path, fingerprint) VALUES (?, ?)",
+                    (directory, fingerprint),
+                )
+            else:
+                self._conn.execute("DELETE FROM directories WHERE path = ?", (directory,))
+
+    def update_content(self, rows: list[dict]):
+        """Stores payload ranges and hashes for files that still have the size and mtime they were read with."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"UPDATE files SET {', '.join(f'{c} = ?' for c in CONTENT_COLUMNS)} "
+                "WHERE path = ? AND size = ? AND mtime_ns = ?",
+                [tuple(row.get(c) for c in CONTENT_COLUMNS) + (row['path'], row['size'], row['mtime_ns'])
+                 for row in rows],
+            )
+
+    def forget_directory(self, directory: str):
+        """Drops the rows of one directory, leaving its subdirectories alone."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE dir = ?", (directory,))
+            self._conn.execute("DELETE FROM directories WHERE path = ?", (directory,))
+            self._conn.execute("DELETE FROM health WHERE path = ?", (directory,))
+            self._conn.execute("DELETE FROM health_roots WHERE path = ?", (directory,))
+
+    def indexed_directories(self, root: str) -> set[str]:
+        """Returns root and every directory below it that has indexed files or a stored fingerprint."""
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT dir FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?
+                UNION SELECT path FROM directories WHERE path = ? OR substr(path, 1, ?) = ?
+                UNION SELECT path FROM health WHERE path = ? OR substr(path, 1, ?) = ?
+                """,
+                (root, len(prefix), prefix) * 3,
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def prune(self, root: str, seen_dirs: set[str]):
+        """Drops rows for directories below root that were not seen by the last scan."""
+        gone = [(directory,) for directory in self.indexed_directories(root) if directory not in seen_dirs]
+        if gone:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM files WHERE dir = ?", gone)
+                self._conn.executemany("DELETE FROM directories WHERE path = ?", gone)
+                self._conn.executemany("DELETE FROM health WHERE path = ?", gone)
+
+    def lookup_health(self, directory: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM health WHERE path = ?", (directory,)).fetchone()
+        return dict(row) if row else None
+
+    def store_health(self, directory: str, fingerprint: str, facts: dict):
+        """Stores the library-health facts of one album directory, valid while its crawler fingerprint matches."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO health (path, fingerprint, name_key, missing_cover, missing_mbid,
+                                               track_count, found_mbid, cover_name, has_thumbnails)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    directory, fingerprint, os.path.basename(directory).casefold(),
+                    facts['missing_cover'], facts['missing_mbid'], facts['track_count'],
+                    facts['found_mbid'], facts['cover_name'], facts['has_thumbnails'],
+                ),
+            )
+
+    def mark_health_crawled(self, root: str):
+        """Records that the health facts of every folder below root were just gathered."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO health_roots (path, crawled_at) VALUES (?, ?)", (root, time.time())
+            )
+
+    def has_health(self, root: str, max_age: float | None = None) -> bool:
+        """Whether root, or a folder containing it, was crawled for health facts in full (within max_age seconds)."""
+        path = Path(root)
+        candidates = [str(path)] + [str(parent) for parent in path.parents]
+        since = time.time() - max_age if max_age is not None else 0
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM health_roots WHERE path IN ({', '.join('?' for _ in candidates)}) "
+                "AND crawled_at >= ? LIMIT 1",
+                candidates + [since],
+            ).fetchone()
+        return row is not None
+
+    def query_health(self, root: str, after: str | None = None, limit: int = 100,
+                     missing_cover: bool | None = None, missing_mbid: bool | None = None,
+                     name_prefix: str | None = None) -> tuple[list[dict], int, dict[str, int]]:
+        """
+        Pages through the stored health facts below root in path order, starting after the given path.
+        Returns (rows, number of rows matching the filters, counts over the whole root).
+        The path range keeps every query on the primary key index.
+        """
+        low, high = _subtree_range(root)
+        scope = "(path = ? OR (path >= ? AND path < ?))"
+        scope_params = [root, low, high]
+
+        filters = []
+        filter_params = []
+        if missing_cover is not None:
+            filters.append("missing_cover = ?")
+            filter_params.append(int(missing_cover))
+        if missing_mbid is not None:
+            filters.append("missing_mbid = ?")
+            filter_params.append(int(missing_mbid))
+        if name_prefix:
+            prefix = name_prefix.casefold()
+            filters.append("substr(name_key, 1, ?) = ?")
+            filter_params += [len(prefix), prefix]
+        where = " AND ".join([scope] + filters)
+
+        with self._lock:
+            counts = self._conn.execute(
+                f"""
+                SELECT count(*) AS albums, coalesce(sum(missing_cover), 0) AS missing_cover,
+                       coalesce(sum(missing_mbid), 0) AS missing_mbid
+                FROM health WHERE {scope}
+                """,
+                scope_params,
+            ).fetchone()
+            total = self._conn.execute(
+                f"SELECT count(*) FROM health WHERE {where}", scope_params + filter_params
+            ).fetchone()[0]
+            page_where = where + (" AND path > ?" if after is not None else "")
+            page_params = scope_params + filter_params + ([after] if after is not None else [])
+            rows = self._conn.execute(
+                f"SELECT * FROM health WHERE {page_where} ORDER BY path LIMIT ?", page_params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows], total, dict(counts)
+
+    def lookup_cover(self, source: str, size: int, mtime_ns: int) -> str | None:
+        """Returns the cover store name recorded for a cover file or audio file, if it is unchanged."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name FROM covers WHERE source = ? AND size = ? AND mtime_ns = ?", (source, size, mtime_ns)
+            ).fetchone()
+        return row['name'] if row else None
+
+    def store_cover(self, source: str, size: int, mtime_ns: int, name: str, local: bool = False):
+        """Records the cover name of a source; local marks a cover file that is served in place."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO covers (source, size, mtime_ns, name, local) VALUES (?, ?, ?, ?, ?)",
+                (source, size, mtime_ns, name, int(local)),
+            )
+
+    def cover_files(self, name: str) -> list[tuple[str, int, int]]:
+        """Returns (path, size, mtime_ns) of every local cover file recorded under a cover name."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, size, mtime_ns FROM covers WHERE name = ? AND local = 1", (name,)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _subtree_range(root: str) -> tuple[str, str]:
+    # Every path below root sorts within [root + sep, root + next char after sep)
+    prefix = root.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+_index: ScanIndex | None = None
+_index_lock = threading.Lock()
+
+def get_scan_index() -> ScanIndex | None:
+    """Returns the process-wide scan index, or None when it is disabled or unavailable."""
+    global _index
+    if not settings.SCAN_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = ScanIndex(settings.CACHE_DIR / "scan_index.sqlite3")
+            except Exception as e:
+                logger.warning(f"Scan index unavailable, falling back to full scans: {e}")
+                return None
+        return _index
@@ -0,0 +1,137 @@
+import base64
+import bisect
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+from app.domain.models import LibraryHealthIssue
+from app.domain.records import AlbumRecord
+
+# Upper bound for a single page, whatever the client asks for
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode('utf-8', 'surrogateescape')).decode('ascii')
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor, altchars=b'-_', validate=True).decode('utf-8', 'surrogateescape')
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def album_filter(status: str | None = None, missing_cover: bool | None = None, missing_mbid: bool | None = None,
+                 artist_prefix: str | None = None) -> Callable[[AlbumRecord], bool] | None:
+    """Builds the predicate for /scan/page; None when no filter is set. Embedded art isn't tracked per album."""
+    if status is None and missing_cover is None and missing_mbid is None and not artist_prefix:
+        return None
+    prefix = artist_prefix.casefold() if artist_prefix else None
+
+    def matches(album: AlbumRecord) -> bool:
+        if status is not None and album.status != status:
+            return False
+        if missing_cover is not None and (album.local_cover_path is None) != missing_cover:
+            return False
+        if missing_mbid is not None and (album.mb_release_id is None) != missing_mbid:
+            return False
+        return prefix is None or album.artist.casefold().startswith(prefix)
+    return matches
+
+def health_filter(missing_cover: bool | None = None, missing_mbid: bool | None = None,
+                  artist_prefix: str | None = None) -> Callable[[LibraryHealthIssue], bool] | None:
+    """Builds the predicate for /library-scan/page. The artist prefix matches the "Artist - Album" folder name."""
+    if missing_cover is None and missing_mbid is None and not artist_prefix:
+        return None
+    prefix = artist_prefix.casefold() if artist_prefix else None
+
+    def matches(issue: LibraryHealthIssue) -> bool:
+        if missing_cover is not None and issue.missing_cover != missing_cover:
+            return False
+        if missing_mbid is not None and issue.missing_mbid != missing_mbid:
+            return False
+        return prefix is None or Path(issue.folder_path).name.casefold().startswith(prefix)
+    return matches
+
+class _Snapshot:
+    """Scan results of one root, kept sorted by path so pages can be cut with a keyset cursor."""
+
+    def __init__(self, items: dict[str, object]):
+        self.items = items
+        self.keys = sorted(items)
+
+    def upsert(self, key: str, item):
+        if key not in self.items:
+            bisect.insort(self.keys, key)
+        self.items[key] = item
+
+    def remove(self, key: str):
+        if self.items.pop(key, None) is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def page(self, cursor: str | None, limit: int, predicate: Callable | None = None) -> dict:
+        """
+        Returns up to limit matching items after the cursor, plus the cursor of the next page and the total
+        number of matches. Cursors stay valid across updates since they encode the last path, not an offset.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        start = bisect.bisect_right(self.keys, decode_cursor(cursor)) if cursor else 0
+        if predicate is None:
+            total = len(self.keys)
+            page_keys = self.keys[start:start + limit + 1]
+        else:
+            total = 0
+            page_keys = []
+            for position, key in enumerate(self.keys):
+                if predicate(self.items[key]):
+                    total += 1
+                    if position >= start and len(page_keys) <= limit:
+                        page_keys.append(key)
+
+        has_more = len(page_keys) > limit
+        page_keys = page_keys[:limit]
+        return {
+            'items': [self.items[key] for key in page_keys],
+            'next_cursor': encode_cursor(page_keys[-1]) if has_more else None,
+            'total': total,
+        }
+
+class ScanResultStore:
+    """
+    Keeps the latest /scan and /library-scan results per input root, so clients can page through them
+    without re-sending the whole library on every request.
+    """
+
+    def __init__(self):
+        self._albums: dict[str, _Snapshot] = {}
+        self._health: dict[str, _Snapshot] = {}
+
+    def put_albums(self, root: Path, albums: list[AlbumRecord]):
+        self._albums[str(root)] = _Snapshot({str(album.path): album for album in albums})
+
+    def put_health(self, root: Path, issues: list[LibraryHealthIssue]):
+        self._health[str(root)] = _Snapshot({issue.folder_path: issue for issue in issues})
+
+    def albums(self, root: Path) -> _Snapshot | None:
+        return self._albums.get(str(root))
+
+    def health(self, root: Path) -> _Snapshot | None:
+        return self._health.get(str(root))
+
+    def update_album(self, directory: str, album: AlbumRecord | None):
+        """Applies a single re-extracted directory (None if it no longer holds an album) to stored results."""
+        for root, snapshot in self._albums.items():
+            if _is_under(directory, root):
+                if album is None:
+                    snapshot.remove(directory)
+                else:
+                    snapshot.upsert(directory, album)
+        # Health results can't be derived from an album record; drop them so the next page request rescans
+        for root in [root for root in self._health if _is_under(directory, root)]:
+            del self._health[root]
+
+def _is_under(directory: str, root: str) -> bool:
+    return directory == root or directory.startswith(root.rstrip(os.sep) + os.sep)
+
+_store = ScanResultStore()
+
+def get_scan_results() -> ScanResultStore:
+    return _store
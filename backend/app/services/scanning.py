@@ -0,0 +1,426 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.core.settings import settings
+from app.domain.models import LibraryHealthIssue
+from app.domain.records import AlbumRecord, FileRecord
+from app.services.covers import CoverStore, cover_url, get_cover_store
+from app.services.crawler import AudioEntry, DirectoryListing, crawl, list_directory
+from app.services.duplicates import DuplicateDetector
+from app.services.scan_index import ScanIndex, get_scan_index
+from app.services.scan_results import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.services.tag_probe import probe_tags
+from app.services.tag_reader import read_tags
+from app.services.thumbnails import ThumbnailCache, get_thumbnail_cache, thumbnail_url
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress heartbeats in streaming scans
+PROGRESS_INTERVAL = 0.5
+
+def sanitize_str(val):
+    if not isinstance(val, str):
+        return val
+    try:
+        # Convert surrogate escapes back to bytes, then replace invalid utf-8
+        return val.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+    except Exception:
+        return str(val)
+
+class ScanService:
+    def __init__(self, max_workers: int | None = None, index: ScanIndex | None = None, probe: bool | None = None,
+                 covers: CoverStore | None = None, thumbnails: ThumbnailCache | None = None):
+        self.max_workers = max_workers or settings.SCAN_WORKERS
+        self.probe = settings.SCAN_TAG_PROBE if probe is None else probe
+        self.index = index if index is not None else get_scan_index()
+        self.covers = covers or get_cover_store()
+        self.thumbnails = thumbnails or get_thumbnail_cache()
+
+    async def scan(self, input_path: Path) -> list[AlbumRecord]:
+        """
+        Walks input_path and builds one AlbumRecord per directory containing audio files.
+        Convert with AlbumRecord.to_model() when building a response.
+        """
+        albums = await self._run(input_path, self._scan_album_directory)
+        albums_map = {}
+        for album in albums:
+            albums_map[album.id] = album
+        albums = list(albums_map.values())
+        await self._flag_duplicates(albums)
+        return albums
+
+    async def iter_scan(self, input_path: Path):
+        """
+        Streaming variant of scan(): yields ('album', AlbumRecord, progress) as soon as a directory
+        is processed, interleaved with ('progress', None, progress) heartbeats.
+        Albums arrive in completion order, not walk order. Albums found to be duplicates once
+        the walk is complete are sent a second time with duplicate_of set.
+        """
+        last_progress = 0.0
+        albums = []
+        async for _, album, progress in self._iter_results(input_path, self._scan_album_directory):
+            if album is not None:
+                albums.append(album)
+                yield 'album', album, progress
+            now = time.monotonic()
+            if album is None or now - last_progress >= PROGRESS_INTERVAL:
+                last_progress = now
+                yield 'progress', None, progress
+
+        for album in await self._flag_duplicates(albums):
+            yield 'album', album, progress
+
+    async def _flag_duplicates(self, albums: list[AlbumRecord]) -> list[AlbumRecord]:
+        # Needs every album of the scan, so it runs once the walk is done
+        if not settings.SCAN_DETECT_DUPLICATES or len(albums) < 2:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, DuplicateDetector(self.index).flag, albums)
+
+    async def library_health(self, input_path: Path) -> list[LibraryHealthIssue]:
+        """
+        Reports missing cover art and MusicBrainz ids per album directory without modifying files.
+        """
+        issues = await self._run(input_path, self._check_album_directory)
+        if self.index:
+            # From now on health_page can answer for this tree, and any folder below it, from the index
+            await asyncio.get_running_loop().run_in_executor(None, self.index.mark_health_crawled, str(input_path))
+        return issues
+
+    async def health_page(self, input_path: Path, cursor: str | None = None, limit: int = 100,
+                          missing_cover: bool | None = None, missing_mbid: bool | None = None,
+                          artist_prefix: str | None = None, refresh: bool = False) -> dict:
+        """
+        Pages through the library health facts stored in the scan index, without opening any files.
+        The tree is crawled on refresh or unless it, or a folder containing it, was crawled in full within
+        HEALTH_RECRAWL_SECONDS; only changed folders are re-read, and watch mode keeps the facts current in between.
+        Requires the scan index.
+        """
+        loop = asyncio.get_running_loop()
+        root = str(input_path)
+        crawled = functools.partial(self.index.has_health, root, settings.HEALTH_RECRAWL_SECONDS)
+        if refresh or not await loop.run_in_executor(None, crawled):
+            await self.library_health(input_path)
+
+        after = decode_cursor(cursor) if cursor else None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = functools.partial(
+            self.index.query_health, root, after, limit + 1,
+            missing_cover=missing_cover, missing_mbid=missing_mbid, name_prefix=artist_prefix,
+        )
+        rows, total, counts = await loop.run_in_executor(None, query)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'items': [self._health_issue(row) for row in rows],
+            'next_cursor': encode_cursor(rows[-1]['path']) if has_more else None,
+            'total': total,
+            'counts': counts,
+        }
+
+    async def rescan(self, directories) -> list[tuple[Path, AlbumRecord | None]]:
+        """
+        Re-extracts only the given directories, e.g. after a file system change.
+        Returns (directory, AlbumRecord) per directory, with None for directories that no longer hold audio;
+        their index rows are dropped, along with the whole subtree if the directory is gone.
+        """
+        loop = asyncio.get_running_loop()
+        directories = [Path(directory) for directory in directories]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rescan") as pool:
+            albums = await asyncio.gather(
+                *(loop.run_in_executor(pool, self._rescan_directory, directory) for directory in directories)
+            )
+        return list(zip(directories, albums, strict=True))
+
+    async def _run(self, input_path: Path, handler) -> list:
+        results = []
+        async for position, result, _ in self._iter_results(input_path, handler):
+            if result is not None:
+                results.append((position, result))
+        # Keep the top-down walk order callers have always seen
+        results.sort(key=lambda item: item[0])
+        return [result for _, result in results]
+
+    async def _iter_results(self, input_path: Path, handler):
+        """
+        Crawls input_path incrementally and runs handler per album directory on a bounded thread pool,
+        so the event loop stays free while mutagen parses files.
+        Yields (walk position, result, progress) per finished directory and (None, None, progress)
+        once the walk completes. At most SCAN_WORKERS * 2 directories are queued ahead of the workers.
+        """
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scan")
+        walker = crawl(input_path)
+        max_backlog = self.max_workers * 2
+        progress = {'directories_found': 0, 'directories_done': 0, 'files_done': 0, 'walk_complete': False}
+        seen_dirs = set()
+
+        try:
+            walk_step = loop.run_in_executor(pool, next, walker, None)
+            pending = {walk_step}
+            positions = {}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    if fut is walk_step:
+                        entry = fut.result()
+                        walk_step = None
+                        if entry is None:
+                            progress['walk_complete'] = True
+                            yield None, None, dict(progress)
+                            continue
+                        seen_dirs.add(str(entry.path))
+                        task = loop.run_in_executor(pool, handler, entry)
+                        positions[task] = (progress['directories_found'], len(entry.audio_files))
+                        progress['directories_found'] += 1
+                        pending.add(task)
+                    else:
+                        position, file_count = positions.pop(fut)
+                        progress['directories_done'] += 1
+                        progress['files_done'] += file_count
+                        yield position, fut.result(), dict(progress)
+
+                # Keep walking unless the workers are already far behind
+                if walk_step is None and not progress['walk_complete'] and len(positions) < max_backlog:
+                    walk_step = loop.run_in_executor(pool, next, walker, None)
+                    pending.add(walk_step)
+
+            if self.index:
+                await loop.run_in_executor(pool, self.index.prune, str(input_path), seen_dirs)
+        finally:
+            # Don't block the loop on queued work if the request was cancelled
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _rescan_directory(self, directory: Path) -> AlbumRecord | None:
+        listing = list_directory(directory)
+        if listing is not None:
+            album = self._scan_album_directory(listing)
+            if self.index:
+                # Keep the indexed health report current as well; file tags are already in the index
+                self._check_album_directory(listing)
+            return album
+        if self.index:
+            try:
+                if directory.exists():
+                    self.index.forget_directory(str(directory))
+                else:
+                    self.index.prune(str(directory), set())
+            except Exception as e:
+                logger.warning(f"Could not update scan index for {directory}: {e}")
+        return None
+
+    def _load_directory(self, listing: DirectoryListing) -> tuple[bool, dict]:
+        """
+        Returns (unchanged, cached records) for a crawled directory. A directory is unchanged
+        when its crawler fingerprint matches the one stored by the last complete scan.
+        """
+        if not self.index:
+            return False, {}
+        stored_fingerprint, cached = self.index.lookup_directory(str(listing.path))
+        return stored_fingerprint == listing.fingerprint, cached
+
+    def _read_tags(self, file_path: Path, with_picture: bool = False) -> dict:
+        # The header-only probe covers MP3/FLAC/M4A; anything it can't parse goes through mutagen
+        if self.probe:
+            result = probe_tags(file_path, with_picture=with_picture)
+            if result is not None:
+                return result
+        return read_tags(file_path, with_picture=with_picture)
+
+    def _is_fresh(self, record: dict | None, entry: AudioEntry) -> bool:
+        return bool(record) and record['size'] == entry.size and record['mtime_ns'] == entry.mtime_ns
+
+    def _file_record(self, file_path: Path, entry: AudioEntry, cached: dict, fresh_records: list) -> dict:
+        # Only re-open files that changed since they were last indexed
+        path_key = str(file_path)
+        record = cached.get(path_key)
+        if not self._is_fresh(record, entry):
+            record = self._read_tags(file_path)
+            record.update(path=path_key, dir=str(file_path.parent), size=entry.size, mtime_ns=entry.mtime_ns)
+            fresh_records.append(record)
+        return record
+
+    def _save_records(self, listing: DirectoryListing, fresh_records: list, complete: bool):
+        if not self.index:
+            return
+        directory = str(listing.path)
+        try:
+            self.index.update_directory(
+                directory,
+                fresh_records,
+                {str(listing.path / entry.name) for entry in listing.audio_files},
+                fingerprint=listing.fingerprint if complete else None,
+            )
+        except Exception as e:
+            logger.warning(f"Could not update scan index for {directory}: {e}")
+
+    def _scan_album_directory(self, listing: DirectoryListing) -> AlbumRecord:
+        root_path = listing.path
+        album_files = []
+
+        # Heuristic metadata aggregation from files
+        artists = []
+        albums_titles = []
+        years = []
+
+        unchanged, cached = self._load_directory(listing)
+        fresh_records = []
+
+        for entry in listing.audio_files:
+            file_path = root_path / entry.name
+            record = self._file_record(file_path, entry, cached, fresh_records)
+
+            if record['artist']:
+                artists.append(record['artist'])
+            if record['album']:
+                albums_titles.append(record['album'])
+            if record['year']:
+                years.append(record['year'])
+
+            mb_release_id = record['mb_album_id']
+            album_files.append(FileRecord(
+                filename=sanitize_str(entry.name),
+                extension=file_path.suffix.lower(),
+                size_bytes=entry.size,
+                title=sanitize_str(record['title']),
+                artist=sanitize_str(record['artist']),
+                album=sanitize_str(record['album']),
+                year=record['year'],
+                mb_album_id=sanitize_str(mb_release_id) if mb_release_id else None,
+                duration=record.get('duration'),
+            ))
+
+        # Unchanged directories were fully indexed last time; skip the write entirely
+        if not (unchanged and not fresh_records):
+            self._save_records(listing, fresh_records, complete=True)
+
+        # Determine majority vote for Folder Album info
+        def get_most_common(lst):
+            return Counter(lst).most_common(1)[0][0] if lst else None
+
+        detected_artist = get_most_common(artists)
+        detected_title = get_most_common(albums_titles)
+        detected_year = get_most_common(years)
+
+        # Fallback to folder name heuristics if tags missing
+        folder_name = root_path.name
+        if not detected_artist or not detected_title:
+            parts = folder_name.split(' - ')
+            if not detected_artist:
+                detected_artist = parts[0] if len(parts) > 1 else "Unknown Artist"
+            if not detected_title:
+                detected_title = parts[1] if len(parts) > 1 else folder_name
+
+        local_cover = root_path / listing.cover if listing.cover else None
+        # Thumbnails are generated on first request; scans only hash the (usually unchanged) cover file
+        cover_name = self.covers.add_file(local_cover) if local_cover else None
+
+        # Check consensus MBID
+        mb_ids = [f.mb_album_id for f in album_files if f.mb_album_id]
+        consensus_mbid = None
+        if mb_ids and len(mb_ids) == len(album_files) and len(set(mb_ids)) == 1:
+            consensus_mbid = mb_ids[0]
+
+        return AlbumRecord(
+            path=sanitize_str(str(root_path)),
+            title=sanitize_str(detected_title) or "Unknown Album",
+            artist=sanitize_str(detected_artist) or "Unknown Artist",
+            year=detected_year,
+            files=tuple(album_files),
+            # If we have ID, it's effectively matched but we need to fetch details. Let's keep Pending but pass ID.
+            status="Match" if consensus_mbid else "Pending",
+            mb_release_id=sanitize_str(consensus_mbid) if consensus_mbid else None,
+            local_cover_path=sanitize_str(str(local_cover)) if local_cover else None,
+            thumbnail_url=thumbnail_url(cover_name) if cover_name else None,
+        )
+
+    def _check_album_directory(self, listing: DirectoryListing) -> LibraryHealthIssue:
+        root_path = listing.path
+
+        # Health facts only change with the directory; reuse them while the fingerprint matches
+        if self.index:
+            stored = self.index.lookup_health(str(root_path))
+            if stored and stored['fingerprint'] == listing.fingerprint and (
+                not stored['cover_name'] or self.covers.path_for(stored['cover_name'])
+            ):
+                return self._health_issue(stored)
+
+        local_cover_path = root_path / listing.cover if listing.cover else None
+        has_cover = local_cover_path is not None
+        has_mbid = False
+        found_mbid = None
+        cover_name = self.covers.add_file(local_cover_path) if local_cover_path else None
+        picture_file = None
+
+        unchanged, cached = self._load_directory(listing)
+        fresh_records = []
+
+        # Iterate through files in case the first one listed lacks tags (happens on Windows NTFS)
+        for entry in listing.audio_files:
+            file_path = root_path / entry.name
+            record = self._file_record(file_path, entry, cached, fresh_records)
+
+            if not has_cover and record['has_picture']:
+                has_cover = True
+                picture_file = (file_path, entry)
+            if not has_mbid and record['mb_album_id']:
+                has_mbid = True
+                found_mbid = record['mb_album_id']
+
+            # If both are found, we don't need to check more files
+            if has_mbid and has_cover:
+                break
+
+        if fresh_records or not unchanged:
+            indexed = {record['path'] for record in fresh_records}
+            complete = all(
+                str(root_path / entry.name) in indexed or self._is_fresh(cached.get(str(root_path / entry.name)), entry)
+                for entry in listing.audio_files
+            )
+            self._save_records(listing, fresh_records, complete)
+
+        # The index only knows that a picture exists; extract it once from the one file that has it
+        if picture_file:
+            file_path, entry = picture_file
+            cover_name = self.covers.remembered(file_path, entry.size, entry.mtime_ns)
+            if not cover_name:
+                picture = self._read_tags(file_path, with_picture=True).get('picture')
+                if picture:
+                    cover_name = self.covers.add_embedded(file_path, *picture)
+
+        # The health view shows every cover, so decode each one now while we're on a worker thread
+        has_thumbnails = bool(cover_name) and self.thumbnails.ensure(cover_name)
+
+        facts = {
+            'path': str(root_path),
+            'missing_cover': not has_cover,
+            'missing_mbid': not has_mbid,
+            'track_count': len(listing.audio_files),
+            'found_mbid': found_mbid,
+            'cover_name': cover_name,
+            'has_thumbnails': has_thumbnails,
+        }
+        if self.index:
+            try:
+                self.index.store_health(str(root_path), listing.fingerprint, facts)
+            except Exception as e:
+                logger.warning(f"Could not update health index for {root_path}: {e}")
+        return self._health_issue(facts)
+
+    def _health_issue(self, facts: dict) -> LibraryHealthIssue:
+        cover_name = facts['cover_name']
+        return LibraryHealthIssue(
+            folder_path=sanitize_str(facts['path']),
+            missing_cover=bool(facts['missing_cover']),
+            missing_mbid=bool(facts['missing_mbid']),
+            track_count=facts['track_count'],
+            found_mbid=sanitize_str(facts['found_mbid']) if facts['found_mbid'] else None,
+            cover_url=cover_url(cover_name) if cover_name else None,
+            thumbnail_url=thumbnail_url(cover_name) if cover_name and facts['has_thumbnails'] else None,
+        )
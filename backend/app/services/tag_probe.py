@@ -0,0 +1,368 @@
+import logging
+import os
+import struct
+from pathlib import Path
+
+from app.services.tag_reader import TAG_FIELDS, is_album_id_key, is_artist_id_key, parse_year
+
+logger = logging.getLogger(__name__)
+
+# Frames or blocks larger than this are treated as a corrupt header and handed back to mutagen
+MAX_META_BLOCK = 16 * 1024 * 1024
+
+ID3_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+ID3_TEXT_FRAMES = {'TIT2': 'title', 'TPE1': 'artist', 'TALB': 'album', 'TDRC': 'date', 'TYER': 'date'}
+
+MP4_KEYS = {b'\xa9nam': 'title', b'\xa9ART': 'artist', b'\xa9alb': 'album', b'\xa9day': 'date'}
+
+# MPEG audio header tables, keyed by (version, layer)
+MPEG_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MPEG_BITRATES[(2, 3)] = MPEG_BITRATES[(2, 2)]
+MPEG_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+class ProbeUnsupported(Exception):
+    """The file uses a feature the probe doesn't parse; the caller should fall back to mutagen."""
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _read_exact(fileobj, size: int) -> bytes:
+    if size > MAX_META_BLOCK:
+        raise ProbeUnsupported(f"metadata block of {size} bytes")
+    data = fileobj.read(size)
+    if len(data) != size:
+        raise ProbeUnsupported("truncated metadata")
+    return data
+
+def _id3_strings(data: bytes) -> list[str]:
+    if not data:
+        return ['']
+    encoding, raw = ID3_ENCODINGS.get(data[0], 'latin-1'), data[1:]
+    if data[0] not in (1, 2):
+        return raw.decode(encoding, 'replace').split('\x00')
+    # UTF-16 values are split on aligned double nulls; each one may carry its own BOM
+    parts, start = [], 0
+    for pos in range(0, len(raw) - 1, 2):
+        if raw[pos:pos + 2] == b'\x00\x00':
+            parts.append(raw[start:pos])
+            start = pos + 2
+    parts.append(raw[start:])
+    return [part.decode(encoding, 'replace') for part in parts]
+
+def _probe_id3v2(fileobj, result: dict, with_picture: bool) -> int:
+    """Parses an ID3v2.3/2.4 tag at the current position frame by frame. Returns the offset after the tag."""
+    start = fileobj.tell()
+    header = fileobj.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        fileobj.seek(start)
+        return start
+
+    major, flags = header[3], header[5]
+    tag_end = start + 10 + _syncsafe(header[6:10]) + (10 if flags & 0x10 else 0)
+    if major not in (3, 4) or flags & 0x80:
+        # ID3v2.2 frame ids and whole-tag unsynchronisation are left to mutagen
+        raise ProbeUnsupported(f"ID3v2.{major} flags {flags:#x}")
+
+    if flags & 0x40:
+        ext_size = _read_exact(fileobj, 4)
+        fileobj.seek(_syncsafe(ext_size) - 4 if major == 4 else struct.unpack('>I', ext_size)[0], os.SEEK_CUR)
+
+    while fileobj.tell() + 10 <= tag_end:
+        frame_header = fileobj.read(10)
+        frame_id = frame_header[:4]
+        if len(frame_header) < 10 or not frame_id.strip(b'\x00') or not frame_id.isalnum():
+            break  # padding
+        frame_id = frame_id.decode('latin-1')
+        size = _syncsafe(frame_header[4:8]) if major == 4 else struct.unpack('>I', frame_header[4:8])[0]
+        frame_flags = struct.unpack('>H', frame_header[8:10])[0]
+        body_start = fileobj.tell()
+
+        # Compressed or encrypted frames (v2.3 0x80/0x40, v2.4 0x08/0x04/0x02 unsync) are skipped
+        unreadable = frame_flags & (0x00C0 if major == 3 else 0x000E)
+        wanted = frame_id in ID3_TEXT_FRAMES or frame_id in ('TXXX', 'UFID') or \
+            (frame_id == 'APIC' and with_picture and 'picture' not in result)
+
+        if frame_id == 'APIC':
+            result['has_picture'] = True
+        if wanted and not unreadable:
+            data = _read_exact(fileobj, size)
+            if frame_flags & (0x0020 if major == 3 else 0x0040):
+                data = data[1:]  # grouping identity byte, ahead of the v2.4 data length indicator
+            if major == 4 and frame_flags & 0x0001:
+                data = data[4:]  # data length indicator
+            if frame_id in ID3_TEXT_FRAMES:
+                field = ID3_TEXT_FRAMES[frame_id]
+                result[field] = result[field] or _id3_strings(data)[0] or None
+            elif frame_id == 'TXXX':
+                values = _id3_strings(data)
+                desc, value = values[0], (values[1] if len(values) > 1 else '')
+                if not result['mb_album_id'] and is_album_id_key(desc):
+                    result['mb_album_id'] = value or None
+                elif not result['mb_artist_id'] and is_artist_id_key(desc):
+                    result['mb_artist_id'] = value or None
+            elif frame_id == 'UFID':
+                owner, _, ident = data.partition(b'\x00')
+                if owner == b'http://musicbrainz.org':
+                    result['mb_recording_id'] = ident.decode('utf-8', 'replace')
+            elif frame_id == 'APIC':
+                result['picture'] = _parse_apic(data)
+
+        fileobj.seek(body_start + size)
+
+    fileobj.seek(tag_end)
+    return tag_end
+
+def _parse_apic(data: bytes) -> tuple[str, bytes]:
+    # encoding, mime\0, picture type, description terminated in the frame encoding, image data
+    mime, _, rest = data[1:].partition(b'\x00')
+    desc_and_image = rest[1:]
+    if data[0] in (1, 2):
+        pos = 0
+        while pos + 1 < len(desc_and_image) and desc_and_image[pos:pos + 2] != b'\x00\x00':
+            pos += 2
+        image = desc_and_image[pos + 2:]
+    else:
+        image = desc_and_image.partition(b'\x00')[2]
+    return mime.decode('latin-1') or 'image/jpeg', image
+
+def skip_id3v2(fileobj) -> int:
+    """Seeks past the ID3v2 tags at the current position and returns the offset after them."""
+    # Some rippers stack several tags; skip all of them
+    while True:
+        header = fileobj.read(10)
+        if len(header) < 10 or header[:3] != b'ID3':
+            fileobj.seek(-len(header), os.SEEK_CUR)
+            return fileobj.tell()
+        fileobj.seek(_syncsafe(header[6:10]) + (10 if header[5] & 0x10 else 0), os.SEEK_CUR)
+
+def _probe_id3v1(fileobj, result: dict):
+    # mutagen merges ID3v1 into ID3v2, with v2 taking precedence
+    fileobj.seek(0, os.SEEK_END)
+    if fileobj.tell() < 128:
+        return
+    fileobj.seek(-128, os.SEEK_END)
+    data = fileobj.read(128)
+    if data[:3] != b'TAG':
+        return
+
+    def field(start, end):
+        return data[start:end].split(b'\x00')[0].decode('latin-1').strip() or None
+
+    result['title'] = result['title'] or field(3, 33)
+    result['artist'] = result['artist'] or field(33, 63)
+    result['album'] = result['album'] or field(63, 93)
+    result['date'] = result['date'] or field(93, 97)
+
+def _mpeg_duration(fileobj, audio_start: int) -> float | None:
+    """Reads the first MPEG frame (and its Xing/Info/VBRI header) instead of scanning audio."""
+    fileobj.seek(audio_start)
+    window = fileobj.read(8192)
+    for i in range(len(window) - 4):
+        if window[i] != 0xFF or window[i + 1] & 0xE0 != 0xE0:
+            continue
+        b1, b2, b3 = window[i + 1], window[i + 2], window[i + 3]
+        version = {3: 1, 2: 2, 0: 2.5}.get((b1 >> 3) & 0x03)
+        layer = {3: 1, 2: 2, 1: 3}.get((b1 >> 1) & 0x03)
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x03
+        if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+
+        bitrate = MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+        sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+        samples = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+        mono = (b3 >> 6) == 3
+
+        frame = window[i:]
+        xing = 4 + ((17 if mono else 32) if version == 1 else (9 if mono else 17))
+        if frame[xing:xing + 4] in (b'Xing', b'Info') and len(frame) >= xing + 12:
+            xing_flags = struct.unpack('>I', frame[xing + 4:xing + 8])[0]
+            if xing_flags & 0x1:
+                frames = struct.unpack('>I', frame[xing + 8:xing + 12])[0]
+                return frames * samples / sample_rate
+        if frame[36:40] == b'VBRI' and len(frame) >= 36 + 18:
+            frames = struct.unpack('>I', frame[36 + 14:36 + 18])[0]
+            return frames * samples / sample_rate
+
+        # CBR: estimate from the stream size, as mutagen does
+        fileobj.seek(0, os.SEEK_END)
+        return 8 * (fileobj.tell() - (audio_start + i)) / bitrate
+    return None
+
+def _probe_mp3(fileobj, result: dict, with_picture: bool):
+    audio_start = _probe_id3v2(fileobj, result, with_picture)
+    _probe_id3v1(fileobj, result)
+    result['duration'] = _mpeg_duration(fileobj, audio_start)
+
+def _probe_flac(fileobj, result: dict, with_picture: bool):
+    # mutagen ignores ID3 tags glued in front of FLAC streams, so only skip them
+    skip_id3v2(fileobj)
+    if fileobj.read(4) != b'fLaC':
+        raise ProbeUnsupported("missing fLaC marker")
+
+    last = False
+    while not last:
+        header = fileobj.read(4)
+        if len(header) < 4:
+            break
+        last = bool(header[0] & 0x80)
+        block_type = header[0] & 0x7F
+        size = int.from_bytes(header[1:4], 'big')
+        block_start = fileobj.tell()
+
+        if block_type == 0:  # STREAMINFO
+            info = _read_exact(fileobj, size)
+            packed = int.from_bytes(info[10:18], 'big')
+            sample_rate = packed >> 44
+            total_samples = packed & 0xFFFFFFFFF
+            if sample_rate:
+                result['duration'] = total_samples / sample_rate
+        elif block_type == 4:  # VORBIS_COMMENT
+            _parse_vorbis_comment(_read_exact(fileobj, size), result)
+        elif block_type == 6:  # PICTURE
+            result['has_picture'] = True
+            if with_picture and 'picture' not in result:
+                result['picture'] = _parse_flac_picture(_read_exact(fileobj, size))
+        fileobj.seek(block_start + size)
+
+def _parse_flac_picture(data: bytes) -> tuple[str, bytes]:
+    pos = 4
+    mime_len = struct.unpack('>I', data[pos:pos + 4])[0]
+    mime = data[pos + 4:pos + 4 + mime_len].decode('latin-1')
+    pos += 4 + mime_len
+    desc_len = struct.unpack('>I', data[pos:pos + 4])[0]
+    pos += 4 + desc_len + 16
+    data_len = struct.unpack('>I', data[pos:pos + 4])[0]
+    return mime or 'image/jpeg', data[pos + 4:pos + 4 + data_len]
+
+def _parse_vorbis_comment(data: bytes, result: dict):
+    vendor_len = struct.unpack('<I', data[:4])[0]
+    pos = 4 + vendor_len
+    count = struct.unpack('<I', data[pos:pos + 4])[0]
+    pos += 4
+    for _ in range(count):
+        length = struct.unpack('<I', data[pos:pos + 4])[0]
+        comment = data[pos + 4:pos + 4 + length].decode('utf-8', 'replace')
+        pos += 4 + length
+        key, sep, value = comment.partition('=')
+        if not sep:
+            continue
+        key = key.lower()
+        if key in ('title', 'artist', 'album', 'date'):
+            result[key] = result[key] or value
+        elif is_album_id_key(key):
+            result['mb_album_id'] = result['mb_album_id'] or value
+        elif is_artist_id_key(key):
+            result['mb_artist_id'] = result['mb_artist_id'] or value
+        elif key in ('musicbrainz_trackid', 'musicbrainz_recordingid'):
+            result['mb_recording_id'] = result['mb_recording_id'] or value
+
+def _iter_atoms(fileobj, end: int):
+    """Yields (type, body start, body end) for sibling MP4 atoms, seeking past each body."""
+    while fileobj.tell() + 8 <= end:
+        atom_start = fileobj.tell()
+        size, atom_type = struct.unpack('>I4s', fileobj.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', fileobj.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - atom_start
+        if size < header_size:
+            raise ProbeUnsupported("invalid atom size")
+        body_end = min(atom_start + size, end)
+        yield atom_type, atom_start + header_size, body_end
+        fileobj.seek(body_end)
+
+def _probe_mp4(fileobj, result: dict, with_picture: bool):
+    fileobj.seek(0, os.SEEK_END)
+    file_end = fileobj.tell()
+    fileobj.seek(0)
+
+    for atom_type, _start, end in _iter_atoms(fileobj, file_end):
+        if atom_type != b'moov':
+            continue  # mdat and friends are skipped with a seek
+        for child, c_start, c_end in _iter_atoms(fileobj, end):
+            if child == b'mvhd':
+                data = _read_exact(fileobj, min(c_end - c_start, 32))
+                if data[0] == 1:
+                    timescale, duration = struct.unpack('>IQ', data[20:32])
+                else:
+                    timescale, duration = struct.unpack('>II', data[12:20])
+                if timescale:
+                    result['duration'] = duration / timescale
+            elif child == b'udta':
+                for meta, m_start, m_end in _iter_atoms(fileobj, c_end):
+                    if meta != b'meta':
+                        continue
+                    fileobj.seek(m_start + 4)  # full box version/flags
+                    for ilst, i_start, i_end in _iter_atoms(fileobj, m_end):
+                        if ilst == b'ilst':
+                            fileobj.seek(i_start)
+                            _parse_ilst(fileobj, i_end, result, with_picture)
+        return
+
+def _parse_ilst(fileobj, end: int, result: dict, with_picture: bool):
+    for item, start, item_end in _iter_atoms(fileobj, end):
+        if item == b'covr':
+            result['has_picture'] = True
+            if not with_picture or 'picture' in result:
+                continue
+        elif item not in MP4_KEYS and item != b'----':
+            continue
+
+        fileobj.seek(start)
+        name = None
+        for child, c_start, c_end in _iter_atoms(fileobj, item_end):
+            if child == b'name':
+                name = _read_exact(fileobj, c_end - c_start)[4:].decode('utf-8', 'replace')
+            elif child == b'data':
+                data = _read_exact(fileobj, c_end - c_start)
+                data_type, payload = struct.unpack('>I', data[:4])[0] & 0xFFFFFF, data[8:]
+                if item == b'covr':
+                    result['picture'] = ('image/png' if data_type == 14 else 'image/jpeg', payload)
+                elif item == b'----':
+                    value = payload.decode('utf-8', 'replace')
+                    if name and not result['mb_album_id'] and is_album_id_key(name):
+                        result['mb_album_id'] = value
+                    elif name and not result['mb_artist_id'] and is_artist_id_key(name):
+                        result['mb_artist_id'] = value
+                    elif name and name.lower() == 'musicbrainz track id':
+                        result['mb_recording_id'] = value
+                else:
+                    field = MP4_KEYS[item]
+                    result[field] = result[field] or payload.decode('utf-8', 'replace')
+                break
+
+PROBES = {'.mp3': _probe_mp3, '.flac': _probe_flac, '.m4a': _probe_mp4}
+
+def probe_tags(file_path: Path, with_picture: bool = False) -> dict | None:
+    """
+    Header-only alternative to tag_reader.read_tags. Reads just the ID3v2 frames, FLAC metadata
+    blocks or the MP4 moov/udta atoms and seeks past picture payloads and audio data.
+    Returns the same fields as read_tags, or None if the format or a tag feature isn't
+    supported so the caller can fall back to mutagen.
+    """
+    probe = PROBES.get(Path(file_path).suffix.lower())
+    if probe is None:
+        return None
+
+    result = dict.fromkeys(TAG_FIELDS)
+    result['has_picture'] = False
+    try:
+        with open(file_path, 'rb') as fileobj:
+            probe(fileobj, result, with_picture)
+    except ProbeUnsupported as e:
+        logger.debug(f"Probe fell back to mutagen for {Path(file_path).name}: {e}")
+        return None
+    except (OSError, struct.error, IndexError, ValueError) as e:
+        logger.debug(f"Probe failed for {Path(file_path).name}: {e}")
+        return None
+
+    result['year'] = parse_year(result['date'])
+    return result
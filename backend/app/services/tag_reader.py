@@ -0,0 +1,154 @@
+import base64
+import logging
+from pathlib import Path
+
+import mutagen
+from mutagen.mp4 import MP4Cover, MP4Tags
+
+logger = logging.getLogger(__name__)
+
+# Fields every reader fills in, regardless of container format
+TAG_FIELDS = (
+    'title', 'artist', 'album', 'date', 'year',
+    'mb_album_id', 'mb_artist_id', 'mb_recording_id',
+    'has_picture', 'duration',
+)
+
+MP4_KEYS = {
+    '\xa9nam': 'title',
+    '\xa9ART': 'artist',
+    '\xa9alb': 'album',
+    '\xa9day': 'date',
+}
+
+def is_album_id_key(key: str) -> bool:
+    """Matches the many spellings of the MusicBrainz release id (Picard, foobar, our own TXXX frames)."""
+    k_lower = key.lower()
+    return 'musicbrainz' in k_lower and any(term in k_lower for term in ('albumid', 'release id', 'album id'))
+
+def is_artist_id_key(key: str) -> bool:
+    k_lower = key.lower()
+    return 'musicbrainz' in k_lower and any(term in k_lower for term in ('artistid', 'artist id')) \
+        and 'album' not in k_lower
+
+def parse_year(date) -> int | None:
+    # Extract year 2021 from "2021-01-01"
+    date = str(date) if date else ''
+    return int(date[:4]) if date[:4].isdigit() else None
+
+def _first(value) -> str | None:
+    if value is None:
+        return None
+    if hasattr(value, 'text'):
+        value = value.text
+    if isinstance(value, list | tuple):
+        value = value[0] if value else None
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    return str(value) if value is not None else None
+
+def _read_id3(tags, result: dict, with_picture: bool):
+    result['title'] = _first(tags.get('TIT2'))
+    result['artist'] = _first(tags.get('TPE1'))
+    result['album'] = _first(tags.get('TALB'))
+    result['date'] = _first(tags.get('TDRC'))
+
+    for frame in tags.getall('TXXX'):
+        if not result['mb_album_id'] and is_album_id_key(frame.desc):
+            result['mb_album_id'] = _first(frame)
+        elif not result['mb_artist_id'] and is_artist_id_key(frame.desc):
+            result['mb_artist_id'] = _first(frame)
+
+    ufid = tags.get('UFID:http://musicbrainz.org')
+    if ufid is not None:
+        result['mb_recording_id'] = ufid.data.decode('utf-8', 'replace')
+
+    pictures = tags.getall('APIC')
+    result['has_picture'] = bool(pictures)
+    if with_picture and pictures:
+        result['picture'] = (pictures[0].mime or 'image/jpeg', pictures[0].data)
+
+def _read_vorbis(audio, result: dict, with_picture: bool):
+    # as_dict() lower-cases keys and groups repeated comments
+    comments = audio.tags.as_dict()
+    for key, values in comments.items():
+        if key in ('title', 'artist', 'album', 'date'):
+            result[key] = result[key] or _first(values)
+        elif is_album_id_key(key):
+            result['mb_album_id'] = result['mb_album_id'] or _first(values)
+        elif is_artist_id_key(key):
+            result['mb_artist_id'] = result['mb_artist_id'] or _first(values)
+        elif key in ('musicbrainz_trackid', 'musicbrainz_recordingid'):
+            result['mb_recording_id'] = result['mb_recording_id'] or _first(values)
+
+    # FLAC keeps pictures in metadata blocks, Ogg in a base64 comment
+    pictures = getattr(audio, 'pictures', None) or []
+    encoded = comments.get('metadata_block_picture') or []
+    result['has_picture'] = bool(pictures or encoded)
+    if with_picture:
+        if pictures:
+            result['picture'] = (pictures[0].mime or 'image/jpeg', pictures[0].data)
+        elif encoded:
+            from mutagen.flac import Picture
+            try:
+                pic = Picture(base64.b64decode(encoded[0]))
+                result['picture'] = (pic.mime or 'image/jpeg', pic.data)
+            except Exception:
+                pass
+
+def _read_mp4(tags, result: dict, with_picture: bool):
+    for key, field in MP4_KEYS.items():
+        if key in tags:
+            result[field] = _first(tags[key])
+
+    for key in tags:
+        if not key.startswith('----:'):
+            continue
+        name = key.rsplit(':', 1)[-1]
+        if not result['mb_album_id'] and is_album_id_key(name):
+            result['mb_album_id'] = _first(tags[key])
+        elif not result['mb_artist_id'] and is_artist_id_key(name):
+            result['mb_artist_id'] = _first(tags[key])
+        elif name.lower() == 'musicbrainz track id':
+            result['mb_recording_id'] = _first(tags[key])
+
+    covers = tags.get('covr') or []
+    result['has_picture'] = bool(covers)
+    if with_picture and covers:
+        mime = 'image/png' if covers[0].imageformat == MP4Cover.FORMAT_PNG else 'image/jpeg'
+        result['picture'] = (mime, bytes(covers[0]))
+
+def read_tags(file_path: Path, with_picture: bool = False) -> dict:
+    """
+    Opens an audio file once and extracts everything scan and library-scan need.
+    Returns a dict with TAG_FIELDS; with_picture adds picture=(mime, data) for the first embedded image.
+    """
+    result = dict.fromkeys(TAG_FIELDS)
+    result['has_picture'] = False
+
+    try:
+        audio = mutagen.File(file_path)
+    except Exception as e:
+        logger.warning(f"Error reading metadata for {Path(file_path).name}: {e}")
+        return result
+
+    if audio is None:
+        return result
+
+    if getattr(audio, 'info', None) is not None:
+        result['duration'] = getattr(audio.info, 'length', None)
+
+    tags = audio.tags
+    if tags is not None:
+        try:
+            if hasattr(tags, 'getall'):
+                _read_id3(tags, result, with_picture)
+            elif isinstance(tags, MP4Tags):
+                _read_mp4(tags, result, with_picture)
+            else:
+                _read_vorbis(audio, result, with_picture)
+        except Exception as e:
+            logger.warning(f"Error parsing tags for {Path(file_path).name}: {e}")
+
+    result['year'] = parse_year(result['date'])
+    return result
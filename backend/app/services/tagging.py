@@ -4,17 +4,17 @@ import mutagen
 from mutagen.easyid3 import EasyID3
 
 from app.domain.models import Album
+from app.services.http_client import get_http_client
+from app.services.release_covers import get_release_covers
 
 logger = logging.getLogger(__name__)
 
 class TaggingService:
     async def download_cover_art(self, url: str) -> bytes | None:
-        import httpx
         try:
-            async with httpx.AsyncClient(follow_redirects=True, timeout=5.0) as client:
-                resp = await client.get(url)
-                if resp.status_code == 200:
-                    return resp.content
+            resp = await get_http_client().get(url, timeout=5.0)
+            if resp.status_code == 200:
+                return resp.content
         except Exception as e:
             logger.error(f"Failed to download cover art: {e}")
         return None
@@ -35,8 +35,10 @@ class TaggingService:
             except Exception as e:
                 logger.error(f"Failed to read local cover {album.local_cover_path}: {e}")
 
-        # Priority 2: Online Cover Art (if local not found)
-        if not cover_data and album.cover_art_url:
+        # Priority 2: Online Cover Art (if local not found), usually prefetched while identifying
+        if not cover_data and album.mb_release_id:
+            cover_data = await get_release_covers().fetch(album.mb_release_id, album.cover_art_url)
+        elif not cover_data and album.cover_art_url:
             cover_data = await self.download_cover_art(album.cover_art_url)
 
         for i, file in enumerate(album.files):
@@ -0,0 +1,95 @@
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+from app.core.settings import settings
+from app.services.covers import COVER_URL_PREFIX, CoverStore, get_cover_store
+from app.services.disk_budget import DiskBudget
+
+logger = logging.getLogger(__name__)
+
+JPEG_QUALITY = 85
+
+def thumbnail_url(cover_name: str, size: int | None = None) -> str:
+    return f"{COVER_URL_PREFIX}{cover_name}/thumbnails/{size or min(settings.THUMBNAIL_SIZES)}"
+
+class ThumbnailCache:
+    """
+    Size-bounded disk cache of JPEG thumbnails keyed by cover content hash and edge length.
+    Each cover is decoded once for all THUMBNAIL_SIZES. Hits refresh the file mtime, and the
+    least recently used files are evicted once the cache grows past THUMBNAIL_CACHE_MB.
+    """
+
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None, covers: CoverStore | None = None,
+                 sizes: list[int] | None = None):
+        self.root = Path(root or settings.CACHE_DIR / "thumbnails")
+        self.max_bytes = max_bytes if max_bytes is not None else settings.THUMBNAIL_CACHE_MB * 1024 * 1024
+        self.covers = covers or get_cover_store()
+        self.sizes = sorted(sizes or settings.THUMBNAIL_SIZES, reverse=True)
+        self.budget = DiskBudget(self.root, self.max_bytes)
+
+    def _path(self, cover_name: str, size: int) -> Path:
+        digest = cover_name.split('.')[0]
+        return self.root / digest[:2] / f"{digest}-{size}.jpg"
+
+    def get(self, cover_name: str, size: int) -> Path | None:
+        """Returns the thumbnail, generating all sizes from the cached cover if it isn't on disk."""
+        if size not in self.sizes:
+            return None
+        path = self._path(cover_name, size)
+        try:
+            # Touch for LRU ordering; also tells us whether it exists
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+        self.ensure(cover_name)
+        return path if path.is_file() else None
+
+    def ensure(self, cover_name: str) -> bool:
+        """Makes sure every size of a cover exists. Runs on worker threads; decodes the cover at most once."""
+        missing = [size for size in self.sizes if not self._path(cover_name, size).is_file()]
+        if not missing:
+            return True
+        source = self.covers.path_for(cover_name)
+        if source is None:
+            return False
+
+        try:
+            with Image.open(source) as img:
+                # Let the JPEG decoder downscale while decoding; much cheaper than a full-size decode
+                img.draft('RGB', (missing[0], missing[0]))
+                img = img.convert('RGB')
+                written = 0
+                for size in missing:
+                    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+                    written += self._write(self._path(cover_name, size), img)
+        except Exception as e:
+            logger.warning(f"Could not create thumbnails for {cover_name}: {e}")
+            return False
+
+        self.budget.account(written)
+        return True
+
+    def _write(self, path: Path, img: Image.Image) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path.stat().st_size
+
+_cache: ThumbnailCache | None = None
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    global _cache
+    if _cache is None:
+        _cache = ThumbnailCache()
+    return _cache
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+from watchfiles import Change, awatch
+
+from app.core.settings import settings
+from app.services.crawler import crawl
+from app.services.scan_results import get_scan_results
+from app.services.scanning import ScanService, sanitize_str
+
+logger = logging.getLogger(__name__)
+
+# Events a slow subscriber may fall behind by before it is told to resync with a full scan
+SUBSCRIBER_QUEUE_SIZE = 256
+
+class LibraryWatcher:
+    """
+    Watches a library root via inotify (watchfiles) and re-extracts only the album directories
+    touched by a batch of changes. Subscribers receive album-level events:
+    {"event": "album_updated", "album": {...}}, {"event": "album_removed", "path": "..."}
+    and {"event": "resync"} if they fell too far behind.
+    """
+
+    def __init__(self, root: Path, service: ScanService | None = None, debounce_ms: int | None = None):
+        self.root = Path(root)
+        self.service = service or ScanService()
+        self.debounce_ms = debounce_ms or settings.WATCH_DEBOUNCE_MS
+        self._subscribers: set[asyncio.Queue] = set()
+        self._stop_event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        # Album directories we know about, so removals are only reported for real albums
+        self._known: set[str] | None = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._run(), name="library-watcher")
+
+    async def stop(self):
+        self._stop_event.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except TimeoutError:
+                # wait_for has cancelled the task by now
+                logger.warning("Library watcher did not stop in time")
+            self._task = None
+
+    @contextmanager
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Dropping single events would leave the client inconsistent; make it start over instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"event": "resync"})
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        index = self.service.index
+        if index:
+            self._known = await loop.run_in_executor(None, index.indexed_directories, str(self.root))
+
+        logger.info(f"Watching {self.root} for library changes")
+        try:
+            async for changes in awatch(self.root, debounce=self.debounce_ms, stop_event=self._stop_event):
+                try:
+                    directories = await loop.run_in_executor(None, self._affected_directories, changes)
+                    await self._refresh(directories)
+                except Exception as e:
+                    logger.error(f"Failed to process library changes: {e}")
+        except Exception as e:
+            logger.error(f"Library watcher stopped: {e}")
+
+    def _affected_directories(self, changes: set[tuple[Change, str]]) -> set[Path]:
+        """Maps a batch of raw file system changes to the directories that need re-extracting."""
+        directories = set()
+        for change, raw_path in changes:
+            path = Path(raw_path)
+            if change == Change.deleted:
+                # Could have been a file or a whole album tree; the parent changes either way
+                directories.add(path.parent)
+                directories.add(path)
+                if self.service.index:
+                    directories.update(Path(d) for d in self.service.index.indexed_directories(str(path)))
+            elif path.is_dir():
+                # A directory moved in arrives as a single event, so walk its contents
+                if change == Change.added:
+                    directories.update(listing.path for listing in crawl(path))
+            else:
+                directories.add(path.parent)
+        return {directory for directory in directories if directory == self.root or self.root in directory.parents}
+
+    async def _refresh(self, directories: set[Path]):
+        if not directories:
+            return
+        store = get_scan_results()
+        for directory, album in await self.service.rescan(sorted(directories)):
+            key = str(directory)
+            store.update_album(sanitize_str(key), album)
+            if album is not None:
+                if self._known is not None:
+                    self._known.add(key)
+                self.publish({"event": "album_updated", "album": album.to_model().model_dump(mode="json")})
+            elif self._known is None or key in self._known:
+                if self._known is not None:
+                    self._known.discard(key)
+                self.publish({"event": "album_removed", "path": sanitize_str(key)})
@@ -0,0 +1,174 @@
+"""
+Identification throughput against the local MusicBrainz stand-in (benchmarks/mock_musicbrainz.py):
+
+    python -m benchmarks.identify_throughput --albums 300 --latency-ms 40 --error-rate 0.02
+
+Starts the stand-in on a free port, drives IdentificationService.identify_all over albums from its
+catalogue and reports albums/s, requests by kind, how many albums got the right edition and per-album
+latency percentiles (search and lookups of one album; albums matched from an artist browse have none).
+The rate limit defaults to unlimited so the client side is what gets measured; --rate 1 shows
+production pacing. The response cache is off unless --cache is given.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from app.core.settings import settings
+from app.domain.models import Album, MusicFile
+from app.services.http_client import close_http_client, get_single_flight
+from app.services.identification import IdentificationService
+from app.services.musicbrainz_scheduler import MusicBrainzScheduler
+from app.services.release_covers import get_release_covers
+from benchmarks.mock_musicbrainz import Catalogue, create_app
+
+
+def build_albums(catalogue: Catalogue, count: int, seed: int) -> tuple[list[Album], dict]:
+    """Albums to identify, as a scan would produce them, and the release id each one should get."""
+    rng = random.Random(seed)
+    albums, expected = [], {}
+    for mbids in list(catalogue.by_title.values())[:count]:
+        release = catalogue.releases[rng.choice(mbids)]
+        album_id = f"/music/{len(albums):05d}"
+        files = [
+            MusicFile(
+                filename=f"{track['number']:0>2}.flac",
+                path=Path(album_id) / f"{track['number']:0>2}.flac",
+                extension=".flac",
+                size_bytes=30_000_000,
+                title=track["title"],
+                # Rips rarely match to the millisecond
+                duration=track["length"] / 1000 + rng.uniform(-1.0, 1.0),
+            )
+            for track in release["media"][0]["tracks"]
+        ]
+        albums.append(Album(id=album_id, title=release["title"], artist=release["artist-credit"][0]["name"],
+                            path=Path(album_id), files=files))
+        expected[album_id] = release["id"]
+    return albums, expected
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+class StandIn:
+    """Runs the stand-in in its own thread and event loop, so serving doesn't compete with the client."""
+
+    def __init__(self, app):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+async def run(args) -> dict:
+    service = IdentificationService(scheduler=MusicBrainzScheduler(args.rate, args.burst))
+    latencies = []
+    for name in ("identify_album", "resolve_release"):
+        method = getattr(service, name)
+
+        async def timed(*a, _method=method, **kw):
+            started = time.perf_counter()
+            try:
+                return await _method(*a, **kw)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        setattr(service, name, timed)
+
+    catalogue = args.catalogue
+    albums, expected = build_albums(catalogue, args.albums, args.seed)
+    flights = get_single_flight("MusicBrainz")
+    coalesced = flights.coalesced
+
+    started = time.perf_counter()
+    results = await service.identify_all(albums)
+    elapsed = time.perf_counter() - started
+    if args.covers:
+        await get_release_covers().wait()
+
+    async with httpx.AsyncClient() as client:
+        server_stats = (await client.get(f"{args.base}/_stats")).json()
+    await close_http_client()
+
+    statuses = {}
+    for album in results:
+        statuses[album.status] = statuses.get(album.status, 0) + 1
+    return {
+        "albums": len(albums),
+        "seconds": elapsed,
+        "albums_per_second": len(albums) / elapsed,
+        "statuses": statuses,
+        "correct": sum(album.mb_release_id == expected[album.id] for album in results),
+        "requests_sent": sum(service.scheduler.granted.values()),
+        "coalesced": flights.coalesced - coalesced,
+        "server": server_stats,
+        "latency_p50_ms": 1000 * percentile(latencies, 50),
+        "latency_p99_ms": 1000 * percentile(latencies, 99),
+        "latency_mean_ms": 1000 * statistics.fmean(latencies) if latencies else 0.0,
+        "timed_albums": len(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure album identification against a local MusicBrainz stand-in")
+    parser.add_argument("--albums", type=int, default=300)
+    parser.add_argument("--albums-per-artist", type=int, default=3,
+                        help="At MUSICBRAINZ_BROWSE_MIN_ALBUMS or more, artists are matched from a release browse")
+    parser.add_argument("--rate", type=float, default=10_000.0, help="MusicBrainz requests per second")
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    parser.add_argument("--recordings", type=Path, help="Replay these recorded responses before the catalogue")
+    parser.add_argument("--cache", action="store_true", help="Keep the MusicBrainz response cache on")
+    parser.add_argument("--covers", action="store_true", help="Prefetch covers while identifying")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    artists = -(-args.albums // args.albums_per_artist)
+    args.catalogue = Catalogue(artists, args.albums_per_artist, args.seed)
+    app = create_app(args.catalogue, args.recordings, None, args.error_rate, args.latency_ms, args.jitter_ms,
+                     args.retry_after, args.seed)
+
+    with StandIn(app) as base, tempfile.TemporaryDirectory() as cache_dir:
+        args.base = base
+        settings.MUSICBRAINZ_BASE_URL = f"{base}/ws/2"
+        settings.COVER_ART_BASE_URL = base
+        settings.MUSICBRAINZ_BACKEND = "online"
+        settings.MUSICBRAINZ_CACHE_ENABLED = args.cache
+        settings.COVER_PREFETCH_ENABLED = args.covers
+        settings.CACHE_DIR = Path(cache_dir)
+        # One connection per in-flight request, as against the real service over HTTP/2
+        settings.HTTP_MAX_CONNECTIONS = max(settings.HTTP_MAX_CONNECTIONS, args.burst)
+        report = asyncio.run(run(args))
+
+    print(f"{report['albums']} albums in {report['seconds']:.2f}s: {report['albums_per_second']:.1f} albums/s")
+    print(f"  outcomes: {report['statuses']}, right edition: {report['correct']}/{report['albums']}")
+    print(f"  requests sent: {report['requests_sent']} (+{report['coalesced']} coalesced), "
+          f"served: {dict(sorted(report['server'].items()))}")
+    print(f"  per-album latency over {report['timed_albums']} searched albums: p50 {report['latency_p50_ms']:.1f} ms, "
+          f"p99 {report['latency_p99_ms']:.1f} ms, mean {report['latency_mean_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Local stand-in for the MusicBrainz web service and the Cover Art Archive, so identification can be
+measured without touching musicbrainz.org:
+
+    python -m benchmarks.mock_musicbrainz --port 8765 --latency-ms 40 --error-rate 0.02
+
+and run the app with MUSICBRAINZ_BASE_URL=http://127.0.0.1:8765/ws/2 COVER_ART_BASE_URL=http://127.0.0.1:8765.
+
+Requests are answered from recorded payloads first (--recordings, JSON lines of
+{"path", "params", "status", "body"} keyed like the response cache), then from a generated catalogue.
+With --upstream, requests the recordings don't cover are fetched from the real service at the
+configured rate limit and appended to the recordings file, so a session can be replayed later.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import random
+import re
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from PIL import Image
+
+from app.core.settings import settings
+from app.services.http_client import get_http_client
+from app.services.musicbrainz_cache import request_key
+from app.services.musicbrainz_offline import normalize
+from app.services.musicbrainz_scheduler import BULK, get_musicbrainz_scheduler
+
+NAMESPACE = uuid.UUID("6f2d7c3e-46a4-4f0c-9a39-7d6a1b0f8e21")
+
+QUERY_FIELD = re.compile(r'(\w+):"((?:[^"\\]|\\.)*)"')
+
+def _mbid(*parts) -> str:
+    return str(uuid.uuid5(NAMESPACE, "/".join(map(str, parts))))
+
+class Catalogue:
+    """
+    Generated discography. Every album exists in three editions: the original, a remaster with the
+    same track count but different lengths (only durations tell them apart) and a deluxe edition with
+    bonus tracks, so candidate ranking and duration matching get the same work as with real data.
+    """
+
+    def __init__(self, artists: int = 100, albums_per_artist: int = 6, seed: int = 0):
+        rng = random.Random(seed)
+        self.releases: dict[str, dict] = {}
+        self.by_title: dict[tuple[str, str], list[str]] = {}
+        self.by_artist: dict[str, list[str]] = {}
+        self.artists: dict[str, dict] = {}
+        # Release id -> edition, for checking identification results
+        self.editions: dict[str, str] = {}
+        for a in range(artists):
+            name = f"Artist {a:04d}"
+            artist = {"id": _mbid("artist", a), "name": name, "sort-name": name}
+            self.artists[normalize(name)] = artist
+            self.by_artist[artist["id"]] = []
+            for b in range(albums_per_artist):
+                title = f"Album {a:04d}-{b:02d}"
+                year = 1970 + rng.randrange(50)
+                lengths = [rng.randrange(120, 420) * 1000 for _ in range(rng.randrange(8, 15))]
+                editions = {
+                    "original": (lengths, str(year)),
+                    "remaster": ([length + rng.choice((-1, 1)) * rng.randrange(8, 30) * 1000 for length in lengths],
+                                 str(year + 20)),
+                    "deluxe": (lengths + [rng.randrange(120, 420) * 1000 for _ in range(4)], str(year + 25)),
+                }
+                group = {"id": _mbid("group", a, b), "title": title, "primary-type": "Album",
+                         "first-release-date": str(year)}
+                for edition, (tracks, date) in editions.items():
+                    release = self._release(_mbid("release", a, b, edition), title, date, artist, group, tracks)
+                    self.releases[release["id"]] = release
+                    self.editions[release["id"]] = edition
+                    self.by_title.setdefault((normalize(name), normalize(title)), []).append(release["id"])
+                    self.by_artist[artist["id"]].append(release["id"])
+
+    @staticmethod
+    def _release(mbid: str, title: str, date: str, artist: dict, group: dict, lengths: list[int]) -> dict:
+        tracks = []
+        for position, length in enumerate(lengths, 1):
+            recording = {"id": _mbid(mbid, position), "title": f"Track {position}", "length": length}
+            tracks.append({"id": _mbid(mbid, "track", position), "number": str(position), "position": position,
+                           "title": recording["title"], "length": length, "recording": recording})
+        return {
+            "id": mbid,
+            "title": title,
+            "status": "Official",
+            "date": date,
+            "country": "XW",
+            "barcode": "",
+            "artist-credit": [{"name": artist["name"], "joinphrase": "", "artist": artist}],
+            "release-group": group,
+            "label-info": [{"catalog-number": mbid[:8].upper(), "label": {"id": _mbid("label"), "name": "Stand-in"}}],
+            "media": [{"position": 1, "format": "Digital Media", "track-count": len(tracks), "tracks": tracks}],
+            "cover-art-archive": {"front": True, "artwork": True, "count": 1},
+        }
+
+    def search_release(self, params: dict) -> dict:
+        fields = {name: value.replace('\\"', '"') for name, value in QUERY_FIELD.findall(params.get("query", ""))}
+        found = []
+        for mbid in self.by_title.get((normalize(fields.get("artist", "")), normalize(fields.get("release", ""))), []):
+            release = self.releases[mbid]
+            if "date" in fields and not release["date"].startswith(fields["date"]):
+                continue
+            found.append({
+                "id": mbid,
+                "score": "100",
+                "title": release["title"],
+                "date": release["date"],
+                "track-count": release["media"][0]["track-count"],
+                "artist-credit": release["artist-credit"],
+                "release-group": release["release-group"],
+                "cover-art-archive": release["cover-art-archive"],
+            })
+        return {"count": len(found), "offset": 0, "releases": found[:int(params.get("limit", 25))]}
+
+    def search_artist(self, params: dict) -> dict:
+        fields = dict(QUERY_FIELD.findall(params.get("query", "")))
+        artist = self.artists.get(normalize(fields.get("artist", "")))
+        artists = [{**artist, "score": 100}] if artist else []
+        return {"count": len(artists), "offset": 0, "artists": artists}
+
+    def browse(self, params: dict) -> dict:
+        mbids = self.by_artist.get(params.get("artist", ""), [])
+        offset, limit = int(params.get("offset", 0)), int(params.get("limit", 25))
+        return {"release-count": len(mbids), "release-offset": offset,
+                "releases": [self.releases[mbid] for mbid in mbids[offset:offset + limit]]}
+
+def load_recordings(path: Path | None) -> dict[str, tuple[int, dict]]:
+    recordings = {}
+    if path and path.is_file():
+        with path.open() as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[request_key(entry["path"], entry["params"])] = (entry["status"], entry["body"])
+    return recordings
+
+def _cover(mbid: str) -> bytes:
+    digest = hashlib.blake2b(mbid.encode(), digest_size=3).digest()
+    out = io.BytesIO()
+    Image.new("RGB", (500, 500), tuple(digest)).save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+def create_app(catalogue: Catalogue | None = None, recordings: Path | None = None, upstream: str | None = None,
+               error_rate: float = 0.0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+               retry_after: float = 1.0, seed: int = 0) -> FastAPI:
+    """
+    The stand-in as an ASGI app. error_rate is the share of requests answered with 503 and a
+    Retry-After of retry_after seconds; every request is delayed by latency_ms (± jitter_ms, normal).
+    Counters by request kind are served at GET /_stats and reset with DELETE /_stats.
+    """
+    app = FastAPI(title="MusicBrainz stand-in")
+    catalogue = catalogue or Catalogue(seed=seed)
+    replay = load_recordings(recordings)
+    stats = Counter()
+    rng = random.Random(seed)
+
+    @app.middleware("http")
+    async def faults(request: Request, call_next):
+        if request.url.path.startswith("/_"):
+            return await call_next(request)
+        if latency_ms or jitter_ms:
+            await asyncio.sleep(max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000)
+        if rng.random() < error_rate:
+            stats["injected_503"] += 1
+            return JSONResponse({"error": "The server is overloaded"}, status_code=503,
+                                headers={"Retry-After": f"{retry_after:g}"})
+        return await call_next(request)
+
+    async def answer(kind: str, path: str, request: Request, generate) -> Response:
+        stats[kind] += 1
+        params = dict(request.query_params)
+        key = request_key(path, params)
+        if key in replay:
+            stats["replayed"] += 1
+            status, body = replay[key]
+        elif upstream:
+            stats["upstream"] += 1
+            status, body = await _fetch_upstream(upstream, path, params)
+            if status == 200 or status == 404:
+                replay[key] = (status, body)
+                if recordings:
+                    with recordings.open("a") as f:
+                        f.write(json.dumps({"path": path, "params": params, "status": status, "body": body}) + "\n")
+        else:
+            body = generate(params)
+            status = 404 if body is None else 200
+        return JSONResponse(body if body is not None else {"error": "Not Found"}, status_code=status)
+
+    @app.get("/ws/2/release")
+    async def release(request: Request):
+        if "artist" in request.query_params:
+            return await answer("browse", "release", request, catalogue.browse)
+        return await answer("release_search", "release", request, catalogue.search_release)
+
+    @app.get("/ws/2/release/{mbid}")
+    async def release_lookup(mbid: str, request: Request):
+        return await answer("lookup", f"release/{mbid}", request, lambda _: catalogue.releases.get(mbid))
+
+    @app.get("/ws/2/artist")
+    async def artist(request: Request):
+        return await answer("artist_search", "artist", request, catalogue.search_artist)
+
+    @app.get("/release/{mbid}/front")
+    async def cover(mbid: str):
+        stats["cover"] += 1
+        if mbid not in catalogue.releases and not upstream:
+            return Response(status_code=404)
+        return Response(_cover(mbid), media_type="image/jpeg")
+
+    @app.get("/_stats")
+    async def get_stats() -> dict:
+        return dict(stats)
+
+    @app.delete("/_stats", status_code=204)
+    async def reset_stats():
+        stats.clear()
+
+    return app
+
+async def _fetch_upstream(upstream: str, path: str, params: dict) -> tuple[int, dict | None]:
+    await get_musicbrainz_scheduler().acquire(BULK)
+    response = await get_http_client().get(
+        f"{upstream.rstrip('/')}/{path}", params=params,
+        headers={"User-Agent": settings.MUSICBRAINZ_USER_AGENT, "Accept": "application/json"},
+    )
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local MusicBrainz and Cover Art Archive stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", type=Path, help="JSON lines of recorded responses to replay")
+    parser.add_argument("--upstream", help="Fetch and record misses from here, e.g. https://musicbrainz.org/ws/2")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of injected 503s, seconds")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--artists", type=int, default=100)
+    parser.add_argument("--albums-per-artist", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(Catalogue(args.artists, args.albums_per_artist, args.seed), args.recordings, args.upstream,
+                   args.error_rate, args.latency_ms, args.jitter_ms, args.retry_after, args.seed),
+        host=args.host, port=args.port, log_level="warning",
+    )
@@ -0,0 +1,215 @@
+"""
+Decode and parse cost of large release lookups, as resolve_release requests them
+(recordings+artist-credits+labels+isrcs+release-groups+url-rels+tags+genres):
+
+    python -m benchmarks.release_decoding --discs 1 10 40
+
+Generates box sets of the given sizes and times, per release, the plain JSON decode the lookups
+used to get (json.loads) and the dict-walking album parse that went with it, the typed decode they
+get now (decode_release) and the album parse on top of it, and the bytes a cached lookup takes either way.
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+
+from app.domain.models import Album
+from app.services.identification import IdentificationService
+from app.services.musicbrainz_schema import decode_release, encode_release
+
+
+def _credit(rng: random.Random, count: int = 1) -> list[dict]:
+    credits = []
+    for i in range(count):
+        name = f"Performer {rng.randrange(10_000)}"
+        credits.append({
+            "name": name,
+            "joinphrase": " & " if i < count - 1 else "",
+            "artist": {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "name": name,
+                "sort-name": name,
+                "disambiguation": "",
+                "type": "Person",
+                "type-id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "genres": [],
+                "tags": [],
+            },
+        })
+    return credits
+
+def box_set(discs: int, tracks_per_disc: int = 25, seed: int = 0) -> bytes:
+    """A lookup-shaped multi-disc release with the relations, ISRCs and credits a real box set carries."""
+    rng = random.Random(seed)
+    media = []
+    for disc in range(1, discs + 1):
+        tracks = []
+        for position in range(1, tracks_per_disc + 1):
+            length = rng.randrange(90, 600) * 1000
+            credit = _credit(rng, rng.choice((1, 1, 2)))
+            tracks.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "number": str(position),
+                "position": position,
+                "title": f"Track {disc}-{position}",
+                "length": length,
+                "artist-credit": credit,
+                "recording": {
+                    "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "title": f"Track {disc}-{position}",
+                    "length": length,
+                    "video": False,
+                    "disambiguation": "live" if rng.random() < 0.2 else "",
+                    "first-release-date": f"{rng.randrange(1960, 2020)}-01-01",
+                    "isrcs": [f"GB{rng.randrange(10**9):09d}{i}" for i in range(rng.randrange(1, 4))],
+                    "artist-credit": credit,
+                },
+            })
+        media.append({
+            "position": disc,
+            "title": f"Disc {disc}",
+            "format": "CD",
+            "format-id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "track-count": len(tracks),
+            "track-offset": 0,
+            "tracks": tracks,
+        })
+    release = {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": "The Complete Recordings",
+        "status": "Official",
+        "status-id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "date": "2015-11-20",
+        "country": "XE",
+        "barcode": "0602547497650",
+        "asin": None,
+        "quality": "normal",
+        "packaging": "Box",
+        "disambiguation": "",
+        "text-representation": {"language": "eng", "script": "Latn"},
+        "label-info": [{"catalog-number": "4749765", "label": {"id": str(uuid.UUID(int=rng.getrandbits(128))),
+                                                              "name": "Universal", "label-code": 7162}}],
+        "release-group": {"id": str(uuid.UUID(int=rng.getrandbits(128))), "title": "The Complete Recordings",
+                          "primary-type": "Album", "secondary-types": ["Compilation"],
+                          "first-release-date": "2015-11-20", "disambiguation": ""},
+        "artist-credit": _credit(rng),
+        "tags": [{"name": f"tag {i}", "count": rng.randrange(1, 9)} for i in range(15)],
+        "genres": [{"name": f"genre {i}", "count": rng.randrange(1, 9), "id": str(uuid.UUID(int=i))}
+                   for i in range(5)],
+        "relations": [
+            {"type": "discogs", "direction": "forward", "target-type": "url", "attributes": [],
+             "url": {"id": str(uuid.UUID(int=rng.getrandbits(128))), "resource": f"https://example.org/r/{i}"}}
+            for i in range(30)
+        ],
+        "media": media,
+        "cover-art-archive": {"front": True, "back": True, "artwork": True, "count": 12, "darkened": False},
+    }
+    return json.dumps(release).encode()
+
+def parse_dict_album(album: Album, details: dict):
+    """
+    The album parse as it was before lookups were decoded into structs, walking the json.loads() dict.
+    Frozen here as the baseline for the typed parse; keep it as is.
+    """
+    meta = {
+        'musicbrainz_albumid': details.get('id', ''),
+        'barcode': details.get('barcode', ''),
+        'asin': details.get('asin', ''),
+        'releasestatus': details.get('status', ''),
+        'releasecountry': details.get('country', ''),
+    }
+    if 'text-representation' in details:
+        meta['script'] = details['text-representation'].get('script', '')
+    if details.get('label-info'):
+        li = details['label-info'][0]
+        if 'label' in li:
+            meta['label'] = li['label'].get('name', '')
+            meta['catalognumber'] = li.get('catalog-number', '')
+
+    date_str = details.get('date', '')
+    if date_str and date_str[:4].isdigit():
+        album.year = int(date_str[:4])
+    meta['date'] = date_str
+    meta['originaldate'] = date_str
+    if 'release-group' in details:
+        rg = details['release-group']
+        meta['musicbrainz_releasegroupid'] = rg.get('id', '')
+        meta['musicbrainz_primarytype'] = rg.get('primary-type', '')
+        meta['releasetype'] = rg.get('primary-type', '')
+        first_date = rg.get('first-release-date', '')
+        if first_date:
+            meta['originalyear'] = first_date[:4]
+            meta['originaldate'] = first_date
+
+    if details.get('artist-credit'):
+        ac_list = details['artist-credit']
+        if 'artist' in ac_list[0]:
+            meta['musicbrainz_artistid'] = ac_list[0]['artist'].get('id', '')
+            meta['musicbrainz_albumartistid'] = ac_list[0]['artist'].get('id', '')
+            meta['albumartist'] = ac_list[0]['artist'].get('name', '')
+        meta['artistsort'] = '; '.join(item['artist']['sort-name'] for item in ac_list if 'artist' in item)
+        meta['artists'] = '; '.join(item['artist']['name'] for item in ac_list if 'artist' in item)
+
+    if 'tags' in details:
+        tags = [t['name'] for t in details['tags']]
+        meta['genre'] = '; '.join(tags)
+        meta['tags'] = '; '.join(tags)
+    if 'genres' in details:
+        genres = [g['name'] for g in details['genres']]
+        if genres:
+            meta['genre'] = '; '.join(genres)
+
+    if 'media' in details:
+        tracks_data = []
+        meta['totaldiscs'] = str(len(details['media']))
+        for current_disc, medium in enumerate(details['media'], start=1):
+            if current_disc == 1:
+                meta['media'] = medium.get('format', '')
+                meta['discnumber'] = str(medium.get('position', '1'))
+                meta['totaltracks'] = str(medium.get('track-count', ''))
+            for track in medium.get('tracks', []):
+                t_meta = {'musicbrainz_trackid': track.get('id', ''), 'title': track.get('title', '')}
+                if 'artist-credit' in track:
+                    t_meta['artist'] = track['artist-credit'][0]['name']
+                if 'recording' in track:
+                    t_meta['musicbrainz_recordingid'] = track['recording'].get('id', '')
+                tracks_data.append(t_meta)
+        album.tracks_metadata = tracks_data
+    album.extended_metadata = {k: v for k, v in meta.items() if v}
+
+def _best(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time decoding and parsing of large release lookups")
+    parser.add_argument("--discs", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--tracks", type=int, default=25, help="Tracks per disc")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    service = IdentificationService()
+    album = Album(id="box", title="", artist="", path=Path("/box"))
+    print(f"{'discs':>5} {'payload':>10} {'json.loads':>11} {'dict parse':>11} {'typed':>9} {'parse':>9} "
+          f"{'dict cached':>12} {'cached':>10}")
+    for discs in args.discs:
+        raw = box_set(discs, args.tracks)
+        details = json.loads(raw)
+        release = decode_release(raw)
+        loads = _best(lambda raw=raw: json.loads(raw), args.repeat)
+        dict_parse = _best(lambda details=details: parse_dict_album(album, details), args.repeat)
+        typed = _best(lambda raw=raw: decode_release(raw), args.repeat)
+        parse = _best(lambda release=release: service._parse_details_into_album(album, release), args.repeat)
+        dict_cached = len(json.dumps(details, separators=(',', ':')))
+        print(f"{discs:>5} {len(raw) / 1024:>8.0f}kB {loads * 1000:>9.2f}ms {dict_parse * 1000:>9.2f}ms "
+              f"{typed * 1000:>7.2f}ms {parse * 1000:>7.2f}ms {dict_cached / 1024:>10.0f}kB "
+              f"{len(encode_release(release)) / 1024:>8.0f}kB")
+
+if __name__ == "__main__":
+    main()
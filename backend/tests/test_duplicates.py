@@ -0,0 +1,87 @@
+import struct
+
+from mutagen.id3 import ID3, TALB, TIT2, TPE1
+
+from app.domain.records import AlbumRecord, FileRecord
+from app.services.duplicates import DuplicateDetector, payload_range
+
+
+def _mpeg_frames(seed: int = 0, count: int = 40) -> bytes:
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz: 417 byte frames with a distinguishable body
+    return (bytes([0xFF, 0xFB, 0x90, 0x00]) + bytes([seed]) * 413) * count
+
+def _syncsafe(value: int) -> bytes:
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+def _id3v2(title: str, padding: int = 0) -> bytes:
+    text = b"\x03" + title.encode()
+    body = b"TIT2" + _syncsafe(len(text)) + b"\x00\x00" + text + bytes(padding)
+    return b"ID3\x04\x00\x00" + _syncsafe(len(body)) + body
+
+def _id3v1(title: str) -> bytes:
+    return b"TAG" + title.encode().ljust(30, b"\x00") + bytes(95)
+
+def _ape(items: bytes, header: bool = True) -> bytes:
+    def block(flags):
+        return b"APETAGEX" + struct.pack("<IIII", 2000, len(items) + 32, 1, flags) + bytes(8)
+    return (block(0xA0000000) if header else b"") + items + block(0x80000000 if header else 0)
+
+def _write(path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+def _payload(path) -> bytes:
+    start, end = payload_range(path, path.stat().st_size)
+    return path.read_bytes()[start:end]
+
+def test_retagged_copy_has_the_same_payload(tmp_path):
+    audio = _mpeg_frames()
+    original = _write(tmp_path / "a" / "01.mp3", audio)
+    copy = _write(tmp_path / "b" / "01.mp3", audio)
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="Jóga"))
+    tags.add(TPE1(encoding=3, text="Björk"))
+    tags.add(TALB(encoding=3, text="Homogénic"))
+    tags.save(copy, v1=2)
+
+    assert copy.stat().st_size > original.stat().st_size
+    assert _payload(copy) == _payload(original) == audio
+
+def test_stacked_id3v2_tags_are_all_skipped(tmp_path):
+    audio = _mpeg_frames()
+    path = _write(tmp_path / "01.mp3", _id3v2("First", padding=64) + _id3v2("Second") + audio)
+
+    assert payload_range(path, path.stat().st_size) == (len(path.read_bytes()) - len(audio), path.stat().st_size)
+    assert _payload(path) == audio
+
+def test_ape_footer_and_id3v1_are_excluded(tmp_path):
+    audio = _mpeg_frames()
+    items = struct.pack("<II", 5, 0) + b"Title\x00" + "Jóga".encode()
+    with_header = _write(tmp_path / "header.mp3", _id3v2("Jóga") + audio + _ape(items) + _id3v1("Jóga"))
+    footer_only = _write(tmp_path / "footer.mp3", audio + _ape(items, header=False))
+
+    assert _payload(with_header) == audio
+    assert _payload(footer_only) == audio
+
+def _album(root, name: str, tracks: dict[str, bytes]) -> AlbumRecord:
+    files = []
+    for filename, data in tracks.items():
+        path = _write(root / name / filename, data)
+        files.append(FileRecord(filename, ".mp3", path.stat().st_size))
+    return AlbumRecord(str(root / name), name, "Björk", 1997, tuple(files))
+
+def test_flag_marks_a_retagged_copy_of_an_album(tmp_path):
+    tracks = {"01.mp3": _mpeg_frames(1), "02.mp3": _mpeg_frames(2)}
+    original = _album(tmp_path, "a", {name: _id3v2("Original") + data for name, data in tracks.items()})
+    copy = _album(tmp_path, "b", {name: _id3v2("Copy", padding=32) + data + _ape(b"") for name, data in tracks.items()})
+    other = _album(tmp_path, "c", {"01.mp3": _mpeg_frames(3), "02.mp3": _mpeg_frames(2)})
+
+    flagged = DuplicateDetector().flag([copy, original, other])
+
+    assert flagged == [copy]
+    assert copy.duplicate_of == original.path and copy.status == "Duplicate"
+    assert [file.duplicate_of for file in copy.files] == [f"{original.path}/01.mp3", f"{original.path}/02.mp3"]
+    assert original.duplicate_of is None and other.duplicate_of is None
+    # Only one of its tracks is a copy, so the album itself is not a duplicate
+    assert other.files[1].duplicate_of == f"{original.path}/02.mp3"
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.identification import DURATION_ACCEPT
+from app.services.matching import ORDER_FREE_WEIGHT, duration_scores, release_durations
+from app.services.musicbrainz_schema import Medium, Recording, Release, Track
+
+ALBUM = [180.0, 240.0, 300.0, 360.0]
+
+def test_one_track_cannot_pair_with_every_album_track():
+    scores = duration_scores([200.0] * 10, [[200.0]], 3.0)
+
+    assert scores[0] == pytest.approx(0.1)
+    assert scores[0] < DURATION_ACCEPT
+
+def test_repeated_lengths_pair_one_to_one():
+    # Two album tracks of 100s, but the release has only one
+    assert duration_scores([100.0, 100.0, 300.0], [[300.0, 100.0, 500.0]], 3.0)[0] == pytest.approx(
+        ORDER_FREE_WEIGHT * 2 / 3
+    )
+
+def test_extra_candidate_tracks_count_as_misses():
+    scores = duration_scores(ALBUM, [ALBUM, ALBUM + [420.0, 480.0], ALBUM[:2]], 3.0)
+
+    assert scores.tolist() == pytest.approx([1.0, 4 / 6, 2 / 4])
+
+def test_unknown_lengths_are_left_out():
+    scores = duration_scores([180.0, None, 300.0], [[180.0, 240.0, 300.0], [180.0, None, 300.0], [180.0, None, 999.0]],
+                             3.0)
+
+    assert scores.tolist() == pytest.approx([1.0, 1.0, 0.5])
+    assert duration_scores([None, None], [[180.0, 240.0]], 3.0).tolist() == [0.0]
+    assert duration_scores(ALBUM, [], 3.0).tolist() == []
+
+def test_positional_beats_order_free():
+    shuffled = [ALBUM[2], ALBUM[0], ALBUM[3], ALBUM[1]]
+    scores = duration_scores(ALBUM, [ALBUM, shuffled], 3.0)
+
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] == pytest.approx(ORDER_FREE_WEIGHT)
+    assert scores[1] >= DURATION_ACCEPT
+
+def test_tolerance_is_inclusive():
+    assert duration_scores([180.0], [[183.0], [183.5]], 3.0).tolist() == pytest.approx([1.0, 0.0])
+
+def test_release_durations_fall_back_to_the_recording_length():
+    release = Release(media=[
+        Medium(tracks=[Track(length=180_000), Track(recording=Recording(length=240_500))]),
+        Medium(tracks=[Track()]),
+    ])
+
+    assert release_durations(release) == [180.0, 240.5, None]
+    assert release_durations(None) == []
@@ -0,0 +1,115 @@
+import struct
+
+import pytest
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import APIC, ID3, TALB, TDRC, TIT2, TPE1, TXXX, UFID
+from mutagen.mp4 import MP4, MP4Cover, MP4FreeForm
+
+from app.services.tag_probe import probe_tags
+from app.services.tag_reader import read_tags
+
+ALBUM_ID = "f5093c06-23e3-404f-aeaa-40f72885ee3a"
+ARTIST_ID = "87c5dedd-371d-4a53-9f7f-80522fb7f3cb"
+RECORDING_ID = "6a4d2b9e-9b80-4b1c-8a46-8ad3b5a3b0a2"
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+def _mpeg_frames(count: int = 40) -> bytes:
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz, no padding: 417 byte frames
+    return (bytes([0xFF, 0xFB, 0x90, 0x00]) + bytes(413)) * count
+
+def _syncsafe(value: int) -> bytes:
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+def _assert_parity(path):
+    assert probe_tags(path) == read_tags(path)
+    assert probe_tags(path, with_picture=True) == read_tags(path, with_picture=True)
+
+@pytest.mark.parametrize("version", [3, 4])
+@pytest.mark.parametrize("encoding", [0, 1, 2, 3])
+def test_id3_matches_mutagen(tmp_path, version, encoding):
+    path = tmp_path / "track.mp3"
+    path.write_bytes(_mpeg_frames())
+    tags = ID3()
+    tags.add(TIT2(encoding=encoding, text="Jóga"))
+    tags.add(TPE1(encoding=encoding, text="Björk"))
+    tags.add(TALB(encoding=encoding, text="Homogénic"))
+    tags.add(TDRC(encoding=encoding, text="1997-09-22"))
+    tags.add(TXXX(encoding=encoding, desc="MusicBrainz Album Id", text=ALBUM_ID))
+    tags.add(TXXX(encoding=encoding, desc="MusicBrainz Artist Id", text=ARTIST_ID))
+    tags.add(UFID(owner="http://musicbrainz.org", data=RECORDING_ID.encode()))
+    tags.add(APIC(encoding=encoding, mime="image/png", type=3, desc="Cover", data=PNG))
+    tags.save(path, v2_version=version)
+
+    result = probe_tags(path, with_picture=True)
+    assert result["title"] == "Jóga"
+    assert result["mb_album_id"] == ALBUM_ID
+    assert result["mb_recording_id"] == RECORDING_ID
+    assert result["picture"] == ("image/png", PNG)
+    _assert_parity(path)
+
+@pytest.mark.parametrize(("version", "flag"), [(3, 0x0020), (4, 0x0040)])
+def test_id3_grouping_identity_is_not_part_of_the_value(tmp_path, version, flag):
+    # Group id byte, then the text frame proper (UTF-8)
+    body = b"\x07" + b"\x03Grouped title"
+    size = _syncsafe(len(body)) if version == 4 else struct.pack(">I", len(body))
+    frame = b"TIT2" + size + struct.pack(">H", flag) + body
+    tag = b"ID3" + bytes([version, 0, 0]) + _syncsafe(len(frame) + 16) + frame + bytes(16)
+    path = tmp_path / "grouped.mp3"
+    path.write_bytes(tag + _mpeg_frames())
+
+    assert probe_tags(path)["title"] == "Grouped title"
+
+def _streaminfo(sample_rate: int = 44100, total_samples: int = 441000) -> bytes:
+    packed = (sample_rate << 44) | (1 << 41) | (15 << 36) | total_samples
+    return struct.pack(">HH", 4096, 4096) + bytes(6) + packed.to_bytes(8, "big") + bytes(16)
+
+def test_flac_matches_mutagen(tmp_path):
+    path = tmp_path / "track.flac"
+    info = _streaminfo()
+    path.write_bytes(b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info)
+    audio = FLAC(path)
+    audio["title"] = "Jóga"
+    audio["artist"] = "Björk"
+    audio["album"] = "Homogénic"
+    audio["date"] = "1997"
+    audio["musicbrainz_albumid"] = ALBUM_ID
+    audio["musicbrainz_artistid"] = ARTIST_ID
+    audio["musicbrainz_trackid"] = RECORDING_ID
+    picture = Picture()
+    picture.type = 3
+    picture.mime = "image/png"
+    picture.desc = "Cover"
+    picture.data = PNG
+    audio.add_picture(picture)
+    audio.save()
+
+    result = probe_tags(path, with_picture=True)
+    assert result["duration"] == 10.0
+    assert result["picture"] == ("image/png", PNG)
+    _assert_parity(path)
+
+def _atom(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(body)) + kind + body
+
+def test_mp4_matches_mutagen(tmp_path):
+    path = tmp_path / "track.m4a"
+    # mvhd v0: version/flags, created, modified, timescale, duration, rate, volume, reserved, matrix, next track
+    mvhd = bytes(12) + struct.pack(">II", 1000, 123456) + struct.pack(">IH", 0x00010000, 0x0100) + bytes(10) \
+        + bytes(36) + bytes(24) + struct.pack(">I", 2)
+    path.write_bytes(_atom(b"ftyp", b"M4A \x00\x00\x00\x00M4A mp42isom") + _atom(b"moov", _atom(b"mvhd", mvhd))
+                     + _atom(b"mdat", b""))
+    audio = MP4(path)
+    audio["\xa9nam"] = ["Jóga"]
+    audio["\xa9ART"] = ["Björk"]
+    audio["\xa9alb"] = ["Homogénic"]
+    audio["\xa9day"] = ["1997"]
+    audio["----:com.apple.iTunes:MusicBrainz Album Id"] = [MP4FreeForm(ALBUM_ID.encode())]
+    audio["----:com.apple.iTunes:MusicBrainz Artist Id"] = [MP4FreeForm(ARTIST_ID.encode())]
+    audio["----:com.apple.iTunes:MusicBrainz Track Id"] = [MP4FreeForm(RECORDING_ID.encode())]
+    audio["covr"] = [MP4Cover(PNG, imageformat=MP4Cover.FORMAT_PNG)]
+    audio.save()
+
+    result = probe_tags(path, with_picture=True)
+    assert result["mb_album_id"] == ALBUM_ID
+    assert result["duration"] == pytest.approx(123.456)
+    _assert_parity(path)
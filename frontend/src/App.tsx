@@ -48,7 +48,8 @@ interface LibraryHealthIssue {
     missing_mbid: boolean;
     track_count: number;
     found_mbid?: string;
-    cover_base64?: string;
+    cover_url?: string;
+    thumbnail_url?: string;
 }
 
 // --- Components ---
@@ -694,8 +695,8 @@ const LibraryHealthModal = ({ results, onClose, onFixFolder }: { results: Librar
                                         <div className="flex flex-col gap-3">
                                             <div className="flex items-start gap-4">
                                                 <div className="bg-gray-800 rounded-lg w-16 h-16 flex items-center justify-center shrink-0 overflow-hidden border border-gray-700 shadow-inner">
-                                                    {issue.cover_base64 ? (
-                                                        <img src={issue.cover_base64} alt="Cover Preview" className="w-full h-full object-cover" />
+                                                    {issue.cover_url ? (
+                                                        <img src={issue.thumbnail_url ?? issue.cover_url} alt="Cover Preview" loading="lazy" className="w-full h-full object-cover" />
                                                     ) : (
                                                         <svg className="w-6 h-6 text-gray-400" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z" /></svg>
                                                     )}